@@ -5,6 +5,9 @@ APP_DIR = Path.home() / ".codecast"
 THEMES_DIR = APP_DIR / "themes"
 CONFIG_FILE = APP_DIR / "config.json"
 EXTENSIONS_DIR = APP_DIR / "extensions"
+JOURNAL_DIR = APP_DIR / "journal"
+INDEX_DIR = APP_DIR / "index"
+MANIFEST_FILE = APP_DIR / "manifest.json"
 
 # Базовая тема "Dark" (расширенная, с UI цветами)
 BASE_THEMES = {
@@ -15,6 +18,7 @@ BASE_THEMES = {
             "foreground": "#d4d4d4",
             "selection": "#264f78",
             "lineHighlight": "#2a2a2a",
+            "findHighlight": "#613214",
             "lineNumbers": "#858585",
             "fold": "#1e1e1e",
             "keyword": "#569CD6",
@@ -48,6 +52,7 @@ BASE_THEMES = {
             "foreground": "#000000",
             "selection": "#add6ff",
             "lineHighlight": "#f0f0f0",
+            "findHighlight": "#f8e0a0",
             "lineNumbers": "#237893",
             "fold": "#ffffff",
             "keyword": "#0000ff",
@@ -83,6 +88,8 @@ BASE_EXTENSIONS = {
         "displayName": "Python",
         "rules": [
             {"ruleName": "keyword", "regex": r"\b(?:and|assert|break|class|continue|def|del|elif|else|except|exec|finally|for|from|global|if|import|in|is|lambda|not|or|pass|print|raise|return|try|while|with|yield|None|True|False|as|async|await)\b"},
+            {"ruleName": "string", "begin": r'"""', "end": r'"""'},
+            {"ruleName": "string", "begin": r"'''", "end": r"'''"},
             {"ruleName": "string", "regex": r'"[^"\\]*(\\.[^"\\]*)*"'},
             {"ruleName": "string", "regex": r"'[^'\\]*(\\.[^'\\]*)*'"},
             {"ruleName": "comment", "regex": r"#[^\n]*"},
@@ -99,7 +106,7 @@ BASE_EXTENSIONS = {
             {"ruleName": "string", "regex": r'"[^"\\]*(\\.[^"\\]*)*"'},
             {"ruleName": "string", "regex": r"'[^'\\]*(\\.[^'\\]*)*'"},
             {"ruleName": "comment", "regex": r"//[^\n]*"},
-            {"ruleName": "comment", "regex": r"/\*.*?\*/"},
+            {"ruleName": "comment", "begin": r"/\*", "end": r"\*/"},
             {"ruleName": "preprocessor", "regex": r"^\s*#\s*[a-zA-Z]+"},
             {"ruleName": "number", "regex": r"\b[0-9]+\b"},
             {"ruleName": "number", "regex": r"\b0x[0-9a-fA-F]+\b"}
@@ -114,7 +121,7 @@ BASE_EXTENSIONS = {
             {"ruleName": "string", "regex": r'"[^"\\]*(\\.[^"\\]*)*"'},
             {"ruleName": "string", "regex": r"'[^'\\]*(\\.[^'\\]*)*'"},
             {"ruleName": "comment", "regex": r"//[^\n]*"},
-            {"ruleName": "comment", "regex": r"/\*.*?\*/"},
+            {"ruleName": "comment", "begin": r"/\*", "end": r"\*/"},
             {"ruleName": "comment", "regex": r"///[^\n]*"},
             {"ruleName": "number", "regex": r"\b[0-9]+\b"}
         ]
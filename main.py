@@ -1,12 +1,32 @@
+import time
+
+STARTED = time.perf_counter()
+
+import logging
+import os
 import sys
-from PySide6 import QtWidgets
+from PySide6 import QtWidgets, QtCore
+from utils.startup_timing import STARTUP_TIMER
 from main_app import MainApplication
 
 if __name__ == "__main__":
+    # Отладочный вывод: CODECAST_LOG_LEVEL=DEBUG
+    logging.basicConfig(level=os.environ.get("CODECAST_LOG_LEVEL", "WARNING").upper(),
+                        format="%(levelname)s %(name)s: %(message)s")
+    # Длительность фаз запуска: python main.py --startup-timing
+    startup_timing = "--startup-timing" in sys.argv
+    if startup_timing:
+        sys.argv.remove("--startup-timing")
+    STARTUP_TIMER.start(STARTED)
+    STARTUP_TIMER.mark("imports")
     app = QtWidgets.QApplication(sys.argv)
     app.setStyle('Fusion')
+    STARTUP_TIMER.mark("QApplication")
 
     # Применяем тёмную палитру по умолчанию, но она будет перезаписана текущей темой
     window = MainApplication()
     window.show()
-    sys.exit(app.exec())
\ No newline at end of file
+    if startup_timing:
+        # Срабатывает после отложенной фазы запуска окна
+        QtCore.QTimer.singleShot(0, lambda: print(STARTUP_TIMER.report(), file=sys.stderr))
+    sys.exit(app.exec())
@@ -1,10 +1,17 @@
 import os
 import json
+import logging
 from pathlib import Path
 from PySide6 import QtWidgets, QtCore, QtGui
 
-from widgets import TabWidget, CodeEditor, CodeFoldingArea, LineNumberArea, FileTreeDock, FindReplaceDialog, ThemeDialog, ExtensionsDialog
-from utils import ThemeManager, ExtensionManager, ConfigManager, FileSystemWatcher
+from widgets import TabWidget, CodeEditor, LargeFileViewer
+from utils import ThemeManager, ExtensionManager, ConfigManager, FileSystemWatcher, AutoSaveScheduler
+from utils.file_saver import SAVE_POOL
+from utils.edit_journal import EditJournal
+from utils.trigram_index import TrigramIndex
+from utils.startup_timing import STARTUP_TIMER
+
+logger = logging.getLogger(__name__)
 
 class MainApplication(QtWidgets.QMainWindow):
     def __init__(self):
@@ -19,24 +26,27 @@ class MainApplication(QtWidgets.QMainWindow):
         # Initialize managers with config
         self.theme_manager = ThemeManager(self.config)
         self.extension_manager = ExtensionManager(self.config)
-
-        # Setup file system watcher
-        self.setup_watcher()
+        STARTUP_TIMER.mark("config, themes, extensions")
 
         # Tab widget
         self.tab_widget = TabWidget(self.theme_manager, self.extension_manager, self)
         self.setCentralWidget(self.tab_widget)
         self.tab_widget.new_tab()
+        STARTUP_TIMER.mark("first editor")
 
         self.current_editor = None
-
-        # File tree dock
-        self.file_tree_dock = FileTreeDock(self)
-        self.addDockWidget(QtCore.Qt.LeftDockWidgetArea, self.file_tree_dock)
-        if self.config.get("file_tree_visible", True):
-            self.file_tree_dock.show()
-        else:
-            self.file_tree_dock.hide()
+        self.find_dialog = None
+        self.quick_open = None
+        # Дерево файлов, наблюдатель и поиск по файлам создаются после первой отрисовки
+        self.watcher = None
+        self.file_tree_dock = None
+        self.find_in_files_dock = None
+
+        # Триграммный индекс корня дерева для поиска по файлам
+        # (и список его файлов для Go to File); корень задаёт дерево файлов
+        self.project_index = TrigramIndex(self, self.config.get("project_index", True))
+        self.tab_widget.save_finished.connect(
+            lambda path, ok, error: ok and self.project_index.file_changed(path))
 
         # Menus
         self.create_menus()
@@ -51,15 +61,12 @@ class MainApplication(QtWidgets.QMainWindow):
         self.lines_label = QtWidgets.QLabel("Lines: 1")
         self.status_bar.addPermanentWidget(self.lines_label)
 
-        # Autosave timer
-        interval = self.config.get("auto_save_interval", 30) * 1000
-        self.auto_save_timer = QtCore.QTimer()
-        self.auto_save_timer.setInterval(interval)
-        self.auto_save_timer.timeout.connect(self.auto_save_all)
-        self.auto_save_timer.start()
+        # Autosave scheduler
+        self.auto_saver = AutoSaveScheduler(self.config, self.get_code_editors, self)
 
         self.update_editor_connections()
         self.tab_widget.currentChanged.connect(self.on_tab_changed)
+        self.tab_widget.save_finished.connect(self.on_save_finished)
 
         # Apply initial theme to whole app
         self.theme_manager.apply_theme_to_app(QtWidgets.QApplication.instance())
@@ -69,6 +76,69 @@ class MainApplication(QtWidgets.QMainWindow):
 
         # Connect extension signals
         self.extension_manager.extension_enabled_changed.connect(self.on_extension_enabled_changed)
+        STARTUP_TIMER.mark("menus, status bar, theme")
+
+        # Остальное — когда окно уже показано и заработал цикл событий
+        QtCore.QTimer.singleShot(0, self.finish_startup)
+
+    def finish_startup(self):
+        """Вторая фаза запуска: всё, без чего можно начать печатать"""
+        STARTUP_TIMER.mark("show, first paint")
+        self.setup_watcher()
+        self.setup_file_tree()
+        STARTUP_TIMER.mark("file tree, watchers, project index")
+        self.recover_journals()
+
+    def setup_file_tree(self):
+        from widgets import FileTreeDock
+        self.file_tree_dock = FileTreeDock(self)
+        self.addDockWidget(QtCore.Qt.LeftDockWidgetArea, self.file_tree_dock)
+        if self.config.get("file_tree_visible", True):
+            self.file_tree_dock.show()
+        else:
+            self.file_tree_dock.hide()
+        self.file_tree_dock.root_changed.connect(self.project_index.set_root)
+        # Папка запуска может оказаться домашней или корнем диска: для неё только
+        # список файлов, тройки — после выбора корня или первого поиска по файлам
+        self.project_index.set_root(self.file_tree_dock.root_path(), contents=False)
+
+    def get_find_in_files_dock(self):
+        if self.find_in_files_dock is None:
+            from widgets import FindInFilesDock
+            self.find_in_files_dock = FindInFilesDock(self)
+            self.addDockWidget(QtCore.Qt.BottomDockWidgetArea, self.find_in_files_dock)
+        return self.find_in_files_dock
+
+    def recover_journals(self):
+        """Предлагает восстановить правки из журналов, оставшихся после сбоя"""
+        journals = []
+        for journal in EditJournal.find_orphans():
+            if journal.entries:
+                journals.append(journal)
+            else:
+                journal.discard()
+        if not journals:
+            return
+        reply = QtWidgets.QMessageBox.question(
+            self, "Recover unsaved changes",
+            f"CodeCast was not closed properly. Recover unsaved changes in {len(journals)} documents?",
+            QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No
+        )
+        skipped = []
+        for journal in journals:
+            if reply == QtWidgets.QMessageBox.Yes:
+                if journal.base_matches():
+                    editor = self.tab_widget.new_tab(journal.file_path)
+                    if isinstance(editor, CodeEditor):
+                        editor.replay_journal(journal)
+                    else:
+                        skipped.append(journal.file_path)
+                else:
+                    # Файл изменили вне редактора, позиции правок уже не совпадут
+                    skipped.append(journal.file_path)
+            journal.remove_file()
+        if skipped:
+            self.status_bar.showMessage(f"Could not recover changes in: {', '.join(skipped)}")
 
     def setup_watcher(self):
         """Настраивает FileSystemWatcher для отслеживания изменений"""
@@ -81,7 +151,7 @@ class MainApplication(QtWidgets.QMainWindow):
 
     def on_themes_changed(self):
         """Обработчик изменения тем"""
-        print("Themes directory changed, reloading...")
+        logger.info("Themes directory changed, reloading...")
         self.theme_manager.load_themes()
         
         # Если текущая тема изменилась или была удалена, применяем новую
@@ -94,7 +164,7 @@ class MainApplication(QtWidgets.QMainWindow):
 
     def on_extensions_changed(self):
         """Обработчик изменения расширений"""
-        print("Extensions directory changed, reloading...")
+        logger.info("Extensions directory changed, reloading...")
         self.extension_manager.reload_extensions()
         
         # Обновляем все открытые редакторы
@@ -105,17 +175,21 @@ class MainApplication(QtWidgets.QMainWindow):
 
     def on_theme_changed(self, theme_name):
         """Обработчик смены темы"""
-        print(f"Theme changed to: {theme_name}")
-        # Применяем тему ко всем открытым редакторам
+        logger.info("Theme changed to: %s", theme_name)
+        # Видимая вкладка перекрашивается сразу, остальные — при активации
+        current = self.get_current_editor()
+        if current:
+            current.apply_theme()
         for i in range(self.tab_widget.count()):
             editor = self.tab_widget.widget(i)
-            editor.apply_theme()
+            if editor is not current:
+                editor.apply_theme()
         # Обновляем UI
         self.update()
 
     def on_extension_enabled_changed(self, ext_name, enabled):
         """Обработчик изменения статуса расширения"""
-        print(f"Extension {ext_name} {'enabled' if enabled else 'disabled'}")
+        logger.info("Extension %s %s", ext_name, "enabled" if enabled else "disabled")
         # Обновляем все открытые редакторы
         for i in range(self.tab_widget.count()):
             editor = self.tab_widget.widget(i)
@@ -125,37 +199,65 @@ class MainApplication(QtWidgets.QMainWindow):
     def get_current_editor(self):
         return self.tab_widget.currentWidget()
 
+    def get_current_code_editor(self):
+        """Текущая вкладка, если её можно редактировать (не LargeFileViewer)"""
+        editor = self.get_current_editor()
+        return editor if isinstance(editor, CodeEditor) else None
+
+    def get_code_editors(self):
+        """Все открытые вкладки-редакторы, начиная с текущей"""
+        editors = [self.tab_widget.widget(i) for i in range(self.tab_widget.count())]
+        current = self.get_current_editor()
+        editors.sort(key=lambda editor: editor is not current)
+        return [editor for editor in editors if isinstance(editor, CodeEditor)]
+
+    def run_editor_action(self, name):
+        editor = self.get_current_code_editor()
+        if editor:
+            getattr(editor, name)()
+
     def update_editor_connections(self):
         editor = self.get_current_editor()
         if editor == self.current_editor:
             return
-        if self.current_editor is not None:
+        if isinstance(self.current_editor, CodeEditor):
+            # Отключаем только свои слоты: у редактора на этих сигналах
+            # висят собственные обработчики (ширина полей, текущая строка)
             try:
-                self.current_editor.cursorPositionChanged.disconnect()
+                self.current_editor.cursorPositionChanged.disconnect(self.update_cursor_position)
             except (TypeError, RuntimeError):
                 pass
             try:
-                self.current_editor.blockCountChanged.disconnect()
+                self.current_editor.blockCountChanged.disconnect(self.update_line_count)
             except (TypeError, RuntimeError):
                 pass
             try:
-                self.current_editor.textChanged.disconnect()
+                self.current_editor.textChanged.disconnect(self.update_window_title)
             except (TypeError, RuntimeError):
                 pass
-        if editor:
+        elif isinstance(self.current_editor, LargeFileViewer):
+            try:
+                self.current_editor.blockCountChanged.disconnect(self.update_line_count)
+            except (TypeError, RuntimeError):
+                pass
+        if isinstance(editor, CodeEditor):
             editor.cursorPositionChanged.connect(self.update_cursor_position)
             editor.blockCountChanged.connect(self.update_line_count)
             editor.textChanged.connect(self.update_window_title)
+        elif isinstance(editor, LargeFileViewer):
+            editor.blockCountChanged.connect(self.update_line_count)
         self.current_editor = editor
 
     def on_tab_changed(self, index):
         self.update_editor_connections()
+        if self.find_dialog:
+            self.find_dialog.set_editor(self.get_current_editor())
         self.update_cursor_position()
         self.update_line_count()
         self.update_window_title()
 
     def update_cursor_position(self):
-        editor = self.get_current_editor()
+        editor = self.get_current_code_editor()
         if editor:
             cursor = editor.textCursor()
             line = cursor.blockNumber() + 1
@@ -194,6 +296,11 @@ class MainApplication(QtWidgets.QMainWindow):
         open_action.triggered.connect(self.open_file)
         file_menu.addAction(open_action)
 
+        go_to_file_action = QtGui.QAction("Go to File...", self)
+        go_to_file_action.setShortcut("Ctrl+P")
+        go_to_file_action.triggered.connect(self.show_quick_open)
+        file_menu.addAction(go_to_file_action)
+
         open_root_action = QtGui.QAction("Open Folder as Root...", self)
         open_root_action.setShortcut("Ctrl+R")
         open_root_action.triggered.connect(self.choose_and_set_root)
@@ -232,29 +339,29 @@ class MainApplication(QtWidgets.QMainWindow):
         edit_menu = menubar.addMenu("Edit")
         undo_action = QtGui.QAction("Undo", self)
         undo_action.setShortcut("Ctrl+Z")
-        undo_action.triggered.connect(lambda: self.get_current_editor().undo())
+        undo_action.triggered.connect(lambda: self.run_editor_action("undo"))
         edit_menu.addAction(undo_action)
 
         redo_action = QtGui.QAction("Redo", self)
         redo_action.setShortcut("Ctrl+Y")
-        redo_action.triggered.connect(lambda: self.get_current_editor().redo())
+        redo_action.triggered.connect(lambda: self.run_editor_action("redo"))
         edit_menu.addAction(redo_action)
 
         edit_menu.addSeparator()
 
         cut_action = QtGui.QAction("Cut", self)
         cut_action.setShortcut("Ctrl+X")
-        cut_action.triggered.connect(lambda: self.get_current_editor().cut())
+        cut_action.triggered.connect(lambda: self.run_editor_action("cut"))
         edit_menu.addAction(cut_action)
 
         copy_action = QtGui.QAction("Copy", self)
         copy_action.setShortcut("Ctrl+C")
-        copy_action.triggered.connect(lambda: self.get_current_editor().copy())
+        copy_action.triggered.connect(lambda: self.run_editor_action("copy"))
         edit_menu.addAction(copy_action)
 
         paste_action = QtGui.QAction("Paste", self)
         paste_action.setShortcut("Ctrl+V")
-        paste_action.triggered.connect(lambda: self.get_current_editor().paste())
+        paste_action.triggered.connect(lambda: self.run_editor_action("paste"))
         edit_menu.addAction(paste_action)
 
         edit_menu.addSeparator()
@@ -291,6 +398,12 @@ class MainApplication(QtWidgets.QMainWindow):
         find_prev_action.triggered.connect(self.find_previous)
         search_menu.addAction(find_prev_action)
 
+        search_menu.addSeparator()
+        find_in_files_action = QtGui.QAction("Find in Files...", self)
+        find_in_files_action.setShortcut("Ctrl+Alt+F")
+        find_in_files_action.triggered.connect(self.show_find_in_files)
+        search_menu.addAction(find_in_files_action)
+
         # View menu
         view_menu = menubar.addMenu("View")
         fold_all_action = QtGui.QAction("Fold All", self)
@@ -301,6 +414,12 @@ class MainApplication(QtWidgets.QMainWindow):
         unfold_all_action.triggered.connect(self.unfold_all)
         view_menu.addAction(unfold_all_action)
 
+        fold_level_menu = view_menu.addMenu("Fold to Level")
+        for level in range(1, 6):
+            fold_level_action = QtGui.QAction(f"Level {level}", self)
+            fold_level_action.triggered.connect(lambda checked=False, level=level: self.fold_to_level(level))
+            fold_level_menu.addAction(fold_level_action)
+
         view_menu.addSeparator()
 
         self.toggle_file_tree_action = QtGui.QAction("File Tree", self)
@@ -329,33 +448,40 @@ class MainApplication(QtWidgets.QMainWindow):
     def open_file(self):
         file_paths, _ = QtWidgets.QFileDialog.getOpenFileNames(
             self, "Open files", "", "All Files (*)")
+        # Вкладки появляются сразу, а файлы читаются в пуле потоков параллельно
         for file_path in file_paths:
             self.tab_widget.new_tab(file_path)
 
-    def open_file_from_path(self, file_path):
+    def open_file_from_path(self, file_path, line=None, column=0, length=0):
+        """Открывает файл (или переключается на его вкладку) и, если задано, переходит к строке"""
+        editor = None
         for i in range(self.tab_widget.count()):
-            editor = self.tab_widget.widget(i)
-            if editor.file_path == file_path:
+            if self.tab_widget.widget(i).file_path == file_path:
                 self.tab_widget.setCurrentIndex(i)
-                return
-        self.tab_widget.new_tab(file_path)
+                editor = self.tab_widget.widget(i)
+                break
+        else:
+            editor = self.tab_widget.new_tab(file_path)
+        if line is not None:
+            editor.goto_line(line, column, length)
+            editor.setFocus()
 
     def choose_and_set_root(self):
         folder = QtWidgets.QFileDialog.getExistingDirectory(self, "Select Root Folder")
         if folder:
             self.file_tree_dock.set_root(folder)
 
-    def save_current_file(self):
-        editor = self.get_current_editor()
+    def save_current_file(self, wait=False):
+        editor = self.get_current_code_editor()
         if not editor:
             return False
         if editor.file_path:
-            return editor.save_file(editor.file_path)
+            return editor.save_file(editor.file_path, wait=wait)
         else:
-            return self.save_file_as()
+            return self.save_file_as(wait=wait)
 
-    def save_file_as(self):
-        editor = self.get_current_editor()
+    def save_file_as(self, wait=False):
+        editor = self.get_current_code_editor()
         if not editor:
             return False
         file_path, _ = QtWidgets.QFileDialog.getSaveFileName(
@@ -363,7 +489,7 @@ class MainApplication(QtWidgets.QMainWindow):
         if file_path:
             if not os.path.splitext(file_path)[1]:
                 file_path += '.txt'
-            if editor.save_file(file_path):
+            if editor.save_file(file_path, wait=wait):
                 editor.file_path = file_path
                 editor.set_language_from_file(file_path)
                 self.tab_widget.setTabText(self.tab_widget.currentIndex(), os.path.basename(file_path))
@@ -371,72 +497,94 @@ class MainApplication(QtWidgets.QMainWindow):
                 return True
         return False
 
-    def save_all_files(self):
+    def save_all_files(self, wait=False):
         for i in range(self.tab_widget.count()):
             editor = self.tab_widget.widget(i)
             if editor.is_modified:
                 if editor.file_path:
-                    editor.save_file(editor.file_path)
+                    editor.save_file(editor.file_path, wait=wait)
                 else:
                     self.tab_widget.setCurrentIndex(i)
-                    self.save_file_as()
+                    self.save_file_as(wait=wait)
 
-    def auto_save_all(self):
-        for i in range(self.tab_widget.count()):
-            editor = self.tab_widget.widget(i)
-            if editor.is_modified and editor.file_path:
-                editor.save_file(editor.file_path)
+    def on_save_finished(self, file_path, ok, error):
+        if ok:
+            self.status_bar.showMessage(f"Saved {os.path.basename(file_path)}", 3000)
+        else:
+            self.status_bar.showMessage(f"Error saving {file_path}: {error}")
+
+    def get_find_dialog(self):
+        """Один диалог поиска на окно: его индекс совпадений живёт между вызовами"""
+        if self.find_dialog is None:
+            from widgets import FindReplaceDialog
+            self.find_dialog = FindReplaceDialog(self.get_current_editor(), self)
+        else:
+            self.find_dialog.set_editor(self.get_current_editor())
+        return self.find_dialog
+
+    def show_quick_open(self):
+        if self.quick_open is None:
+            from widgets import QuickOpenDialog
+            self.quick_open = QuickOpenDialog(self.project_index, self)
+        self.quick_open.popup()
+
+    def show_find_in_files(self):
+        editor = self.get_current_code_editor()
+        selected = editor.textCursor().selectedText() if editor else ""
+        dock = self.get_find_in_files_dock()
+        dock.show()
+        dock.raise_()
+        dock.focus_input(selected if "\u2029" not in selected else "")
 
     def show_find_dialog(self):
-        dialog = FindReplaceDialog(self.get_current_editor(), self)
+        dialog = self.get_find_dialog()
         dialog.show()
+        dialog.raise_()
+        dialog.find_input.setFocus()
 
     def show_replace_dialog(self):
-        dialog = FindReplaceDialog(self.get_current_editor(), self)
+        dialog = self.get_find_dialog()
         dialog.replace_input.setEnabled(True)
         dialog.replace_btn.setEnabled(True)
         dialog.replace_all_btn.setEnabled(True)
         dialog.show()
+        dialog.raise_()
+        dialog.find_input.setFocus()
 
     def find_next(self):
-        dialog = FindReplaceDialog(self.get_current_editor(), self)
-        dialog.find_next()
+        self.get_find_dialog().find_next()
 
     def find_previous(self):
-        dialog = FindReplaceDialog(self.get_current_editor(), self)
-        dialog.find_previous()
+        self.get_find_dialog().find_previous()
 
     def indent_selection(self):
-        editor = self.get_current_editor()
+        editor = self.get_current_code_editor()
         if editor:
             editor.indent_selection()
 
     def unindent_selection(self):
-        editor = self.get_current_editor()
+        editor = self.get_current_code_editor()
         if editor:
             editor.unindent_selection()
 
     def fold_all(self):
-        editor = self.get_current_editor()
+        editor = self.get_current_code_editor()
         if editor:
-            block = editor.document().begin()
-            while block.isValid():
-                if editor.is_foldable(block):
-                    editor.toggle_fold(block)
-                block = block.next()
+            editor.fold_all()
 
     def unfold_all(self):
-        editor = self.get_current_editor()
+        editor = self.get_current_code_editor()
         if editor:
-            editor.folded_blocks.clear()
-            block = editor.document().begin()
-            while block.isValid():
-                block.setVisible(True)
-                block = block.next()
-            editor.folding_area.update()
-            editor.line_number_area.update()
+            editor.unfold_all()
+
+    def fold_to_level(self, level):
+        editor = self.get_current_code_editor()
+        if editor:
+            editor.fold_to_level(level)
 
     def toggle_file_tree(self, checked=None):
+        if self.file_tree_dock is None:
+            return
         if checked is None:
             checked = self.toggle_file_tree_action.isChecked()
         if checked:
@@ -446,6 +594,7 @@ class MainApplication(QtWidgets.QMainWindow):
         self.toggle_file_tree_action.setChecked(checked)
 
     def show_theme_dialog(self):
+        from widgets import ThemeDialog
         dialog = ThemeDialog(self.theme_manager, self)
         if dialog.exec() == QtWidgets.QDialog.Accepted:
             theme_name = dialog.get_selected_theme()
@@ -454,13 +603,14 @@ class MainApplication(QtWidgets.QMainWindow):
                 pass
 
     def show_extensions_dialog(self):
+        from widgets import ExtensionsDialog
         dialog = ExtensionsDialog(self.extension_manager, self)
         if dialog.exec() == QtWidgets.QDialog.Accepted:
             # Ничего не делаем, изменения уже применились через сигналы
             pass
 
     def run_code(self):
-        editor = self.get_current_editor()
+        editor = self.get_current_code_editor()
         if not editor:
             return
         code = editor.toPlainText()
@@ -495,6 +645,8 @@ class MainApplication(QtWidgets.QMainWindow):
         output_dialog.exec()
 
     def closeEvent(self, event):
+        # Фоновые сохранения должны успеть дописаться
+        SAVE_POOL.waitForDone()
         unsaved = []
         for i in range(self.tab_widget.count()):
             editor = self.tab_widget.widget(i)
@@ -507,11 +659,30 @@ class MainApplication(QtWidgets.QMainWindow):
                 QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No | QtWidgets.QMessageBox.Cancel
             )
             if reply == QtWidgets.QMessageBox.Yes:
-                self.save_all_files()
+                self.save_all_files(wait=True)
                 event.accept()
             elif reply == QtWidgets.QMessageBox.Cancel:
                 event.ignore()
+                return
             else:
                 event.accept()
         else:
-            event.accept()
\ No newline at end of file
+            event.accept()
+        if self.find_in_files_dock is not None:
+            self.find_in_files_dock.search.stop()
+        self.project_index.stop()
+        # Индексатор строк — QThread: его нужно дождаться до уничтожения окна
+        for i in range(self.tab_widget.count()):
+            viewer = self.tab_widget.widget(i)
+            if isinstance(viewer, LargeFileViewer):
+                viewer.cancel_load()
+        # Штатное закрытие: журналы восстановления больше не нужны
+        discard_all = bool(unsaved) and reply == QtWidgets.QMessageBox.No
+        for editor in self.get_code_editors():
+            editor.save_fold_state()
+            if discard_all or not editor.is_modified:
+                editor.journal.discard()
+            else:
+                editor.journal.flush()  # сохранить не удалось — правки останутся в журнале
+        # Отложенная запись настроек (в том числе свёрток) — сейчас, пока процесс жив
+        self.config.flush()
\ No newline at end of file
@@ -0,0 +1,64 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from PySide6 import QtCore
+
+from utils import config_manager
+from utils.config_manager import ConfigManager
+
+
+class ConfigManagerTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.app_dir = Path(tmp.name)
+        self.config_file = self.app_dir / "config.json"
+        for name, value in (("APP_DIR", self.app_dir), ("CONFIG_FILE", self.config_file)):
+            patcher = mock.patch.object(config_manager, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def saved(self):
+        with open(self.config_file, encoding="utf-8") as f:
+            return json.load(f)
+
+    def test_folds_persist_after_flush(self):
+        config = ConfigManager()
+        config.set_folds("/project/a.py", [3, 10])
+        config.flush()
+        self.assertEqual(self.saved()["folds"], {"/project/a.py": [3, 10]})
+        self.assertEqual(ConfigManager().get_folds("/project/a.py"), [3, 10])
+
+    def test_cleared_folds_persist_after_flush(self):
+        config = ConfigManager()
+        config.set_folds("/project/a.py", [3])
+        config.flush()
+        config.set_folds("/project/a.py", [])
+        config.flush()
+        self.assertEqual(self.saved()["folds"], {})
+
+    def test_set_saves_mutated_container(self):
+        config = ConfigManager()
+        config.flush()
+        recent = config.get("recent_files")
+        recent.append("/project/b.py")
+        config.set("recent_files", recent)
+        config.flush()
+        self.assertEqual(self.saved()["recent_files"], ["/project/b.py"])
+
+    def test_set_skips_unchanged_scalar(self):
+        config = ConfigManager()
+        config.flush()
+        config.set("tab_size", config.get("tab_size"))
+        self.assertFalse(config.dirty)
+
+
+if __name__ == "__main__":
+    unittest.main()
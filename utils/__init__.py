@@ -1,13 +1,36 @@
+from .rule_set import RuleSet
+from .fold_index import BlockData, FoldIndex
 from .extension_highlighter import ExtensionHighlighter
 from .extension_manager import ExtensionManager
 from .theme_manager import ThemeManager
 from .config_manager import ConfigManager  
 from .fs_watcher import FileSystemWatcher
+from .file_loader import FileLoader
+from .file_saver import FileSaver
+from .autosave_scheduler import AutoSaveScheduler
+from .edit_journal import EditJournal
+from .ignore_rules import IgnoreRules
+from .file_search import FileSearch
+from .trigram_index import TrigramIndex
+from .fuzzy_match import FuzzyFileMatcher
+from .startup_timing import StartupTimer
 
 __all__ = [
+    "RuleSet",
+    "BlockData",
+    "FoldIndex",
     "ExtensionHighlighter",
     "ExtensionManager",
     "ThemeManager",
     "ConfigManager",  
-    "FileSystemWatcher"
+    "FileSystemWatcher",
+    "FileLoader",
+    "FileSaver",
+    "AutoSaveScheduler",
+    "EditJournal",
+    "IgnoreRules",
+    "FileSearch",
+    "TrigramIndex",
+    "FuzzyFileMatcher",
+    "StartupTimer",
 ]
\ No newline at end of file
@@ -0,0 +1,60 @@
+from PySide6 import QtCore
+
+
+class AutoSaveScheduler(QtCore.QObject):
+    """Единый планировщик автосохранения для всех вкладок.
+
+    Сами файлы пользователя сохраняются только явно. Раз в
+    auto_save_interval секунд (значение читается из конфига заново
+    перед каждым циклом) планировщик дописывает накопленные правки
+    в журналы восстановления (EditJournal) по одному документу с
+    паузой SPREAD_MS, чтобы записи не шли одним всплеском.
+    Документы без новых правок пропускаются.
+    """
+
+    SPREAD_MS = 250
+
+    def __init__(self, config_manager, get_editors, parent=None):
+        super().__init__(parent)
+        self.config = config_manager
+        self.get_editors = get_editors  # -> список открытых CodeEditor
+
+        self.cycle_timer = QtCore.QTimer(self)
+        self.cycle_timer.setSingleShot(True)
+        self.cycle_timer.timeout.connect(self.start_cycle)
+
+        self.flush_timer = QtCore.QTimer(self)
+        self.flush_timer.setInterval(self.SPREAD_MS)
+        self.flush_timer.timeout.connect(self.flush_next)
+        self.saved_this_cycle = set()  # id редакторов, журнал которых уже записан в этом цикле
+
+        self.schedule()
+
+    def schedule(self):
+        """Планирует следующий цикл; 0 в конфиге отключает автосохранение"""
+        interval = self.config.get("auto_save_interval", 30)
+        if interval and interval > 0:
+            self.cycle_timer.start(int(interval * 1000))
+        else:
+            # Проверяем настройку снова через минуту
+            self.cycle_timer.start(60000)
+
+    def needs_save(self, editor):
+        return not editor.loading and editor.journal.has_unflushed()
+
+    def start_cycle(self):
+        interval = self.config.get("auto_save_interval", 30)
+        if interval and interval > 0 and not self.flush_timer.isActive():
+            self.saved_this_cycle.clear()
+            self.flush_next()
+            self.flush_timer.start()
+        self.schedule()
+
+    def flush_next(self):
+        """Записывает журнал одного документа за тик, пока есть что записывать"""
+        for editor in self.get_editors():
+            if id(editor) not in self.saved_this_cycle and self.needs_save(editor):
+                self.saved_this_cycle.add(id(editor))
+                editor.journal.flush()
+                return
+        self.flush_timer.stop()
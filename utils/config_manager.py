@@ -1,11 +1,31 @@
 import json
+import logging
 from pathlib import Path
+from PySide6 import QtCore
 from config import APP_DIR, CONFIG_FILE
+from utils.file_saver import write_atomic
+
+logger = logging.getLogger(__name__)
 
 class ConfigManager:
+    """Настройки редактора в config.json.
+
+    Изменения только помечают конфиг изменённым; запись на диск
+    откладывается на SAVE_DELAY_MS, так что серия изменений даёт одну
+    перезапись файла. При выходе flush() дописывает несохранённое.
+    """
+
+    MAX_FOLD_FILES = 100
+    SAVE_DELAY_MS = 500
+
     def __init__(self):
         self.config = self._default_config()
         self.config_file = CONFIG_FILE
+        self.dirty = False
+        self.save_timer = QtCore.QTimer()
+        self.save_timer.setSingleShot(True)
+        self.save_timer.setInterval(self.SAVE_DELAY_MS)
+        self.save_timer.timeout.connect(self.flush)
         self.load()
 
     def _default_config(self):
@@ -18,9 +38,14 @@ class ConfigManager:
             "show_folding": True,
             "word_wrap": False,
             "tab_size": 4,
+            "lazy_highlight_threshold": 262144,  # символов; больше — подсветка по частям
+            "stream_load_threshold": 8388608,    # байт; больше — загрузка кусками
+            "large_file_threshold": 268435456,   # байт; больше — просмотр только для чтения
             "console_visible": False,
             "file_tree_visible": True,
+            "project_index": True,  # триграммы содержимого файлов корня для поиска по файлам
             "recent_files": [],
+            "folds": {},  # путь файла -> номера строк свёрнутых блоков
             "extensions_enabled": {}  # для включения/отключения расширений
         }
 
@@ -33,26 +58,39 @@ class ConfigManager:
                     for key, value in loaded.items():
                         if key in self.config:
                             self.config[key] = value
-                    print(f"Config loaded: {self.config}")  # отладка
+                    logger.debug("Config loaded from %s", self.config_file)
             except Exception as e:
-                print(f"Error loading config: {e}")
+                logger.error("Error loading config: %s", e)
         else:
             # Если файла нет, создаём с дефолтными настройками
             self.save()
 
     def save(self):
+        """Помечает конфиг изменённым; файл перепишется по таймеру"""
+        self.dirty = True
+        self.save_timer.start()
+
+    def flush(self):
+        """Сразу записывает изменённый конфиг (атомарно, через временный файл)"""
+        self.save_timer.stop()
+        if not self.dirty:
+            return
         try:
             APP_DIR.mkdir(parents=True, exist_ok=True)
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(self.config, f, indent=4)
-            print(f"Config saved: {self.config}")  # отладка
+            write_atomic(self.config_file, json.dumps(self.config, indent=4))
+            self.dirty = False
+            logger.debug("Config saved to %s", self.config_file)
         except Exception as e:
-            print(f"Error saving config: {e}")
+            logger.error("Error saving config: %s", e)
 
     def get(self, key, default=None):
         return self.config.get(key, default)
 
     def set(self, key, value):
+        # Словарь или список из get() могли изменить на месте и вернуть тем же
+        # объектом: сравнение с ним ничего не скажет, поэтому всегда сохраняем
+        if not isinstance(value, (dict, list)) and key in self.config and self.config[key] == value:
+            return
         self.config[key] = value
         self.save()
 
@@ -64,16 +102,29 @@ class ConfigManager:
         self.config["recent_files"] = recent[:10]
         self.save()
 
+    def get_folds(self, file_path):
+        return self.config.get("folds", {}).get(file_path, [])
+
+    def set_folds(self, file_path, lines):
+        """Запоминает свёрнутые строки файла; хранятся только последние MAX_FOLD_FILES файлов"""
+        folds = self.config.setdefault("folds", {})
+        if not lines and file_path not in folds:
+            return
+        folds.pop(file_path, None)
+        if lines:
+            folds[file_path] = lines
+        for old_path in list(folds)[:-self.MAX_FOLD_FILES]:
+            del folds[old_path]
+        self.save()
+
     def is_extension_enabled(self, ext_name):
         """Проверяет, включено ли расширение"""
-        enabled = self.config.get("extensions_enabled", {}).get(ext_name, True)
-        print(f"Checking if extension '{ext_name}' is enabled: {enabled}")  # отладка
-        return enabled
+        return self.config.get("extensions_enabled", {}).get(ext_name, True)
 
     def set_extension_enabled(self, ext_name, enabled):
         """Включает/отключает расширение"""
         if "extensions_enabled" not in self.config:
             self.config["extensions_enabled"] = {}
         self.config["extensions_enabled"][ext_name] = enabled
-        print(f"Extension '{ext_name}' set to {enabled}")  # отладка
+        logger.debug("Extension '%s' set to %s", ext_name, enabled)
         self.save()
\ No newline at end of file
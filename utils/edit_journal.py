@@ -0,0 +1,180 @@
+from PySide6 import QtCore, QtGui
+from config import JOURNAL_DIR
+import itertools
+import json
+import logging
+import os
+import uuid
+
+
+logger = logging.getLogger(__name__)
+
+
+class EditJournal:
+    """Журнал правок документа для восстановления после сбоя.
+
+    Вместо перезаписи файла на диске в JOURNAL_DIR дописываются только
+    изменения (позиция, сколько символов удалено, вставленный текст)
+    в координатах QTextDocument.contentsChange. Первая строка файла —
+    заголовок с путём и размером/mtime исходного файла, на который
+    накладываются правки. Явное сохранение переносит базу на
+    сохранённый файл, закрытие вкладки удаляет журнал.
+
+    Пока файл журнала существует, его владелец держит рядом QLockFile:
+    другой запущенный экземпляр редактора не примет живой журнал за
+    оставшийся после сбоя.
+    """
+
+    HEADER_KEYS = frozenset(("path", "size", "mtime_ns"))
+
+    def __init__(self, file_path=None, journal_path=None):
+        self.journal_path = journal_path or JOURNAL_DIR / f"{uuid.uuid4().hex}.jsonl"
+        self._seq = itertools.count(1)
+        self.lock = None
+        self.set_base(file_path)
+
+    @staticmethod
+    def make_lock(journal_path):
+        # Нулевой срок: блокировка считается брошенной, только если её процесс завершился
+        lock = QtCore.QLockFile(f"{journal_path}.lock")
+        lock.setStaleLockTime(0)
+        return lock
+
+    @staticmethod
+    def file_stamp(file_path):
+        if not file_path:
+            return None, None
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None, None
+        return stat.st_size, stat.st_mtime_ns
+
+    def set_base(self, file_path):
+        """Начинает журнал заново поверх текущего содержимого file_path"""
+        size, mtime = self.file_stamp(file_path)
+        self.header = {"path": file_path, "size": size, "mtime_ns": mtime}
+        self.entries = []  # (номер, позиция, удалено символов, вставленный текст)
+        self.flushed = 0
+        self.remove_file()
+
+    @property
+    def file_path(self):
+        return self.header["path"]
+
+    def record(self, position, removed, text):
+        self.entries.append((next(self._seq), position, removed, text))
+
+    def mark(self):
+        """Номер последней правки — запоминается вместе со снимком при сохранении"""
+        return self.entries[-1][0] if self.entries else 0
+
+    def has_unflushed(self):
+        return self.flushed < len(self.entries)
+
+    def flush(self):
+        """Дописывает в файл журнала правки, накопленные с прошлого раза"""
+        if not self.has_unflushed():
+            return
+        lines = [json.dumps(entry[1:], ensure_ascii=False) for entry in self.entries[self.flushed:]]
+        try:
+            if self.flushed == 0:
+                JOURNAL_DIR.mkdir(parents=True, exist_ok=True)
+                if self.lock is None:
+                    self.lock = self.make_lock(self.journal_path)
+                    self.lock.tryLock(0)
+                lines.insert(0, json.dumps(self.header, ensure_ascii=False))
+                mode = 'w'
+            else:
+                mode = 'a'
+            with open(self.journal_path, mode, encoding='utf-8') as f:
+                f.write("\n".join(lines) + "\n")
+        except OSError as e:
+            logger.error("Error writing journal %s: %s", self.journal_path, e)
+            return
+        self.flushed = len(self.entries)
+
+    def rebase(self, file_path, mark):
+        """Файл сохранён со снимком на правке mark: оставляем только более поздние"""
+        remaining = [entry for entry in self.entries if entry[0] > mark]
+        self.set_base(file_path)
+        self.entries = remaining
+        self.flush()
+
+    def discard(self):
+        self.entries = []
+        self.flushed = 0
+        self.remove_file()
+
+    def remove_file(self):
+        try:
+            os.unlink(self.journal_path)
+        except OSError:
+            pass
+        if self.lock is not None:
+            self.lock.unlock()
+            self.lock = None
+
+    # --- восстановление ---
+
+    def base_matches(self):
+        """Исходный файл не менялся с момента начала журнала"""
+        if not self.file_path:
+            return True
+        size, mtime = self.file_stamp(self.file_path)
+        return size == self.header["size"] and mtime == self.header["mtime_ns"]
+
+    def apply(self, document):
+        """Накладывает правки журнала на документ одним шагом отмены"""
+        cursor = QtGui.QTextCursor(document)
+        cursor.beginEditBlock()
+        for _, position, removed, text in self.entries:
+            last = document.characterCount() - 1
+            cursor.setPosition(min(position, last))
+            cursor.setPosition(min(position + removed, last), QtGui.QTextCursor.MoveMode.KeepAnchor)
+            cursor.insertText(text)
+        cursor.endEditBlock()
+
+    @classmethod
+    def open(cls, journal_path):
+        """Читает журнал, оставшийся от прошлого запуска"""
+        journal = cls.__new__(cls)
+        journal.journal_path = journal_path
+        journal._seq = itertools.count(1)
+        journal.lock = None
+        with open(journal_path, 'r', encoding='utf-8') as f:
+            journal.header = json.loads(f.readline())
+            if not isinstance(journal.header, dict) or not cls.HEADER_KEYS <= journal.header.keys():
+                raise ValueError("journal header is missing")
+            journal.entries = []
+            for line in f:
+                try:
+                    position, removed, text = json.loads(line)
+                except (ValueError, TypeError):
+                    break  # строка не дописана из-за сбоя
+                journal.record(position, removed, text)
+        journal.flushed = len(journal.entries)
+        return journal
+
+    @classmethod
+    def find_orphans(cls):
+        """Журналы, не удалённые при закрытии, чей владелец уже не работает — значит, редактор упал.
+
+        Найденный журнал остаётся заблокированным до remove_file/discard.
+        """
+        journals = []
+        if not JOURNAL_DIR.exists():
+            return journals
+        for journal_path in sorted(JOURNAL_DIR.glob("*.jsonl"), key=os.path.getmtime):
+            lock = cls.make_lock(journal_path)
+            if not lock.tryLock(0):
+                continue  # журнал ведёт другой запущенный экземпляр
+            try:
+                journal = cls.open(journal_path)
+            except (OSError, ValueError, TypeError, KeyError) as e:
+                logger.error("Error reading journal %s: %s", journal_path, e)
+                lock.unlock()
+                continue
+            journal.lock = lock
+            journals.append(journal)
+        return journals
@@ -1,20 +1,32 @@
 from PySide6 import QtCore, QtGui
+from .rule_set import RuleSet
+from .fold_index import BlockData, MASKED_RULES
 import os
 
 class ExtensionHighlighter(QtGui.QSyntaxHighlighter):
-    def __init__(self, syntax_data, theme_manager, parent=None):
+    CHUNK_BUDGET_MS = 10    # время одного шага фоновой подсветки
+    VIEWPORT_MARGIN = 100   # строк сверх видимой области, подсвечиваемых сразу
+
+    def __init__(self, syntax_data, theme_manager, parent=None, rule_set=None):
         super().__init__(parent)
         self.syntax_data = syntax_data
         self.theme_manager = theme_manager
-        self.rules = []
+        self.rule_set = rule_set or RuleSet(syntax_data)
+        self.formats = {}  # имя правила -> QTextCharFormat
         self.load_rules()
 
+        # Ленивый режим: блоки с номером >= _frontier ещё не подсвечены
+        self._frontier = None
+        self._eager_blocks = set()  # блоки, подсвеченные вне очереди при прокрутке
+        self._chunk_size = 200
+        self._lazy_timer = QtCore.QTimer(self)
+        self._lazy_timer.setInterval(0)
+        self._lazy_timer.timeout.connect(self._highlight_chunk)
+
     def load_rules(self):
-        for rule in self.syntax_data.get("rules", []):
-            rule_name = rule.get("ruleName")
-            regex = rule.get("regex")
-            if not regex:
-                continue
+        """Строит форматы правил из цветов текущей темы"""
+        self.formats = {}
+        for rule_name in set(self.rule_set.rule_names):
             color = self.theme_manager.get_color(rule_name, "#000000")
             fmt = QtGui.QTextCharFormat()
             fmt.setForeground(QtGui.QColor(color))
@@ -22,13 +34,99 @@ class ExtensionHighlighter(QtGui.QSyntaxHighlighter):
                 fmt.setFontItalic(True)
             elif rule_name == "keyword":
                 fmt.setFontWeight(QtGui.QFont.Weight.Bold)
-            # Добавляем правило
-            pattern = QtCore.QRegularExpression(regex)
-            self.rules.append((pattern, fmt))
+            self.formats[rule_name] = fmt
+
+    def apply_theme(self):
+        """Обновляет форматы под новую тему; скомпилированные правила остаются"""
+        self.load_rules()
+
+    def is_lazy(self):
+        return self._frontier is not None
+
+    def start_lazy(self):
+        """Включает ленивый режим: документ подсвечивается по частям в простое.
+
+        Вызывается до setDocument, чтобы полная подсветка Qt пропустила блоки.
+        """
+        self._frontier = 0
+        self._eager_blocks.clear()
+        self._lazy_timer.start()
+
+    def stop_lazy(self):
+        self._frontier = None
+        self._eager_blocks.clear()
+        self._lazy_timer.stop()
+
+    def ensure_highlighted(self, first, last):
+        """Сразу подсвечивает блоки first..last с запасом VIEWPORT_MARGIN"""
+        doc = self.document()
+        if self._frontier is None or doc is None:
+            return
+        first = max(0, first - self.VIEWPORT_MARGIN)
+        last = min(doc.blockCount() - 1, last + self.VIEWPORT_MARGIN)
+        if first <= self._frontier:
+            self._advance(last + 1)
+            return
+        # Видимая область далеко впереди: подсвечиваем её с состоянием,
+        # которое есть сейчас; при подходе очереди блоки пересчитаются
+        block = doc.findBlockByNumber(first)
+        while block.isValid() and block.blockNumber() <= last:
+            number = block.blockNumber()
+            if number not in self._eager_blocks:
+                self._eager_blocks.add(number)
+                self.rehighlightBlock(block)
+            block = block.next()
+
+    def _advance(self, target):
+        """Подсвечивает блоки по порядку, пока граница не дойдёт до target"""
+        if target > self._frontier:
+            self._highlight_blocks(target - self._frontier)
+
+    def _highlight_blocks(self, count):
+        """Подсвечивает count блоков от границы за один проход Qt"""
+        first = self.document().findBlockByNumber(self._frontier)
+        block = first
+        done = 0
+        while block.isValid() and done < count:
+            # Временное состояние заставляет Qt идти дальше по всей пачке,
+            # не открывая отдельную транзакцию на каждый блок
+            block.setUserState(-2)
+            block = block.next()
+            done += 1
+        self._frontier += done
+        if first.isValid():
+            self.rehighlightBlock(first)
+        if not block.isValid():
+            self.stop_lazy()
+        return done
+
+    def _highlight_chunk(self):
+        if self._frontier is None or self.document() is None:
+            self.stop_lazy()
+            return
+        timer = QtCore.QElapsedTimer()
+        timer.start()
+        done = self._highlight_blocks(self._chunk_size)
+        # Подгоняем размер пачки под бюджет времени
+        elapsed = max(1, timer.elapsed())
+        self._chunk_size = max(50, min(20000, done * self.CHUNK_BUDGET_MS // elapsed))
 
     def highlightBlock(self, text):
-        for pattern, fmt in self.rules:
-            matches = pattern.globalMatch(text)
-            while matches.hasNext():
-                match = matches.next()
-                self.setFormat(match.capturedStart(), match.capturedLength(), fmt)
\ No newline at end of file
+        if self._frontier is not None:
+            number = self.currentBlock().blockNumber()
+            if number >= self._frontier and number not in self._eager_blocks:
+                return
+        # Состояние блока сообщает Qt, нужно ли перекрашивать следующие строки
+        spans, state = self.rule_set.scan(text, max(self.previousBlockState(), 0))
+        formats = self.formats
+        for start, length, rule_name in spans:
+            self.setFormat(start, length, formats[rule_name])
+        self.setCurrentBlockState(state)
+
+        # Заодно разбираем строку для сворачивания, уже зная строки и комментарии
+        data = self.currentBlockUserData()
+        if not isinstance(data, BlockData):
+            data = BlockData()
+            self.setCurrentBlockUserData(data)
+        data.parse(text, [(start, length) for start, length, rule_name in spans if rule_name in MASKED_RULES])
+        data.revision = self.currentBlock().revision()
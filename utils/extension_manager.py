@@ -1,9 +1,16 @@
 from config import EXTENSIONS_DIR, BASE_EXTENSIONS
 from .extension_highlighter import ExtensionHighlighter
+from .rule_set import get_rule_set, invalidate_rule_sets
+from .manifest_cache import get_manifest
 from PySide6 import QtCore
+import hashlib
 import json
+import logging
 import os
 
+logger = logging.getLogger(__name__)
+
+
 class ExtensionManager(QtCore.QObject):
     """Менеджер расширений с поддержкой сигналов об изменениях"""
     
@@ -17,10 +24,64 @@ class ExtensionManager(QtCore.QObject):
         self.extension_info = {}  # key: extension name -> project info
         self.extension_dir_names = {}  # key: extension name -> directory name
         self.language_names = {}
+        self.syntax_keys = {}  # key: file extension -> (язык, хеш грамматики)
         self.load_extensions()
 
     def load_extensions(self):
-        """Загружает все расширения из папки"""
+        """Загружает все расширения: из манифеста, если папка расширений не менялась, иначе из файлов"""
+        manifest = get_manifest()
+        entries = manifest.get("extensions")
+        if entries is None:
+            entries = self.scan_extensions(manifest)
+
+        old_extensions = set(self.extension_info.keys())
+        self.extensions.clear()
+        self.extension_info.clear()
+        self.extension_dir_names.clear()
+        self.language_names.clear()
+        self.syntax_keys.clear()
+
+        for entry in entries:
+            dir_name = entry["dir"]
+            project_data = entry["project"]
+            if project_data is None:
+                # Если нет project.json, используем имя папки
+                project_data = {
+                    "name": dir_name,
+                    "version": "0.0.0",
+                    "description": "",
+                    "developers": []
+                }
+            ext_name = project_data.get("name", dir_name)
+            self.extension_info[ext_name] = project_data
+            self.extension_dir_names[ext_name] = dir_name
+
+        # Второй проход: синтаксис для включенных расширений (включение хранится в конфиге, не в манифесте)
+        syntax_by_dir = {entry["dir"]: entry for entry in entries}
+        for ext_name in self.extension_info:
+            entry = syntax_by_dir[self.extension_dir_names[ext_name]]
+            syntax_data = entry["syntax"]
+            if syntax_data is None or not self._is_extension_enabled(ext_name):
+                continue
+            syntax_key = (entry["dir"], entry["syntax_hash"])
+            extensions_list = syntax_data.get("fileExtension", [])
+            if isinstance(extensions_list, str):
+                extensions_list = [extensions_list]
+            for ext in extensions_list:
+                self.extensions[ext] = syntax_data
+                self.language_names[ext] = syntax_data.get("displayName", ext)
+                self.syntax_keys[ext] = syntax_key
+
+        # Скомпилированные правила изменённых грамматик больше не нужны
+        invalidate_rule_sets(set(self.syntax_keys.values()))
+
+        # Проверяем, изменился ли список расширений
+        new_extensions = set(self.extension_info.keys())
+        if old_extensions != new_extensions:
+            self.extensions_updated.emit()
+
+    def scan_extensions(self, manifest):
+        """Читает project.json и грамматики всех расширений и запоминает их в манифесте"""
         EXTENSIONS_DIR.mkdir(parents=True, exist_ok=True)
         
         # Создаём базовые расширения, если их нет
@@ -48,63 +109,36 @@ class ExtensionManager(QtCore.QObject):
                 with open(ext_dir / "syntaxhighlighter.json", 'w', encoding='utf-8') as f:
                     json.dump(syntax_data, f, indent=4)
 
-        # Загружаем все расширения
-        old_extensions = set(self.extension_info.keys())
-        self.extensions.clear()
-        self.extension_info.clear()
-        self.extension_dir_names.clear()
-        self.language_names.clear()
-        
-        for ext_dir in EXTENSIONS_DIR.iterdir():
-            if ext_dir.is_dir():
-                project_file = ext_dir / "project.json"
-                syntax_file = ext_dir / "syntaxhighlighter.json"
-                dir_name = ext_dir.name
-                
-                # Загружаем информацию о расширении
-                if project_file.exists():
-                    try:
-                        with open(project_file, 'r', encoding='utf-8') as f:
-                            project_data = json.load(f)
-                            ext_name = project_data.get("name", dir_name)
-                            self.extension_info[ext_name] = project_data
-                            self.extension_dir_names[ext_name] = dir_name
-                    except Exception as e:
-                        print(f"Error loading project info {ext_dir}: {e}")
-                else:
-                    # Если нет project.json, используем имя папки
-                    ext_name = dir_name
-                    self.extension_info[ext_name] = {
-                        "name": ext_name,
-                        "version": "0.0.0",
-                        "description": "",
-                        "developers": []
-                    }
-                    self.extension_dir_names[ext_name] = dir_name
-
-        # Второй проход: загружаем синтаксис для включенных расширений
-        for ext_name, ext_info in self.extension_info.items():
-            dir_name = self.extension_dir_names[ext_name]
-            syntax_file = EXTENSIONS_DIR / dir_name / "syntaxhighlighter.json"
-            
-            # Загружаем синтаксис (только если расширение включено)
-            if syntax_file.exists() and self._is_extension_enabled(ext_name):
+        ext_dirs = [ext_dir for ext_dir in EXTENSIONS_DIR.iterdir() if ext_dir.is_dir()]
+        stamp = manifest.stamp([EXTENSIONS_DIR]
+                               + [path for ext_dir in ext_dirs
+                                  for path in (ext_dir, ext_dir / "project.json", ext_dir / "syntaxhighlighter.json")])
+        entries = []
+        for ext_dir in ext_dirs:
+            project_file = ext_dir / "project.json"
+            syntax_file = ext_dir / "syntaxhighlighter.json"
+            entry = {"dir": ext_dir.name, "project": None, "syntax": None, "syntax_hash": None}
+
+            # Загружаем информацию о расширении
+            if project_file.exists():
                 try:
-                    with open(syntax_file, 'r', encoding='utf-8') as f:
-                        syntax_data = json.load(f)
-                    extensions_list = syntax_data.get("fileExtension", [])
-                    if isinstance(extensions_list, str):
-                        extensions_list = [extensions_list]
-                    for ext in extensions_list:
-                        self.extensions[ext] = syntax_data
-                        self.language_names[ext] = syntax_data.get("displayName", ext)
+                    with open(project_file, 'r', encoding='utf-8') as f:
+                        entry["project"] = json.load(f)
                 except Exception as e:
-                    print(f"Error loading syntax {syntax_file}: {e}")
+                    logger.error("Error loading project info %s: %s", ext_dir, e)
+                    continue
 
-        # Проверяем, изменился ли список расширений
-        new_extensions = set(self.extension_info.keys())
-        if old_extensions != new_extensions:
-            self.extensions_updated.emit()
+            # Грамматика разбирается для всех расширений, чтобы включение не требовало пересканирования
+            if syntax_file.exists():
+                try:
+                    raw = syntax_file.read_bytes()
+                    entry["syntax"] = json.loads(raw.decode('utf-8'))
+                    entry["syntax_hash"] = hashlib.sha1(raw).hexdigest()
+                except Exception as e:
+                    logger.error("Error loading syntax %s: %s", syntax_file, e)
+            entries.append(entry)
+        manifest.put("extensions", stamp, entries)
+        return entries
 
     def _is_extension_enabled(self, ext_name):
         """Проверяет, включено ли расширение в конфиге"""
@@ -114,7 +148,18 @@ class ExtensionManager(QtCore.QObject):
         """Возвращает подсветку для файла"""
         ext = os.path.splitext(file_path)[1].lower()
         if ext in self.extensions:
-            return ExtensionHighlighter(self.extensions[ext], theme_manager, parent=None)
+            return ExtensionHighlighter(self.extensions[ext], theme_manager, parent=None,
+                                        rule_set=self.get_rule_set_for_file(file_path))
+        return None
+
+    def get_rule_set_for_file(self, file_path):
+        """Возвращает общий скомпилированный набор правил для файла"""
+        ext = os.path.splitext(file_path)[1].lower()
+        syntax_key = self.syntax_keys.get(ext)
+        syntax_data = self.extensions.get(ext)
+        if syntax_key and syntax_data:
+            language, content_hash = syntax_key
+            return get_rule_set(language, content_hash, syntax_data)
         return None
 
     def get_all_extensions_info(self):
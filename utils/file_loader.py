@@ -0,0 +1,69 @@
+from PySide6 import QtCore
+import os
+import threading
+
+
+class FileLoaderSignals(QtCore.QObject):
+    """Сигналы FileLoader (QRunnable сам по себе не QObject)"""
+
+    chunk_loaded = QtCore.Signal(str, int)  # текст, процент загрузки
+    finished = QtCore.Signal()
+    failed = QtCore.Signal(str)
+
+
+class FileLoader(QtCore.QRunnable):
+    """Читает и декодирует файл в пуле потоков.
+
+    Текст отдаётся в поток GUI сигналами: целиком для обычных файлов
+    или кусками по CHUNK_SIZE символов для больших. В очереди одновременно
+    не больше MAX_PENDING кусков, чтобы память не росла быстрее, чем
+    редактор успевает их вставлять.
+    """
+
+    CHUNK_SIZE = 1 << 20
+    MAX_PENDING = 4
+
+    def __init__(self, file_path, chunked=False, extension_manager=None):
+        super().__init__()
+        self.file_path = file_path
+        self.chunked = chunked
+        self.extension_manager = extension_manager
+        self.signals = FileLoaderSignals()
+        self.credits = threading.Semaphore(self.MAX_PENDING)
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+        self.credits.release()
+
+    def chunk_consumed(self):
+        """Вызывается потоком GUI после вставки очередного куска"""
+        self.credits.release()
+
+    def emit_chunk(self, text, percent):
+        self.credits.acquire()
+        if not self.cancelled:
+            self.signals.chunk_loaded.emit(text, percent)
+
+    def run(self):
+        try:
+            size = max(1, os.path.getsize(self.file_path))
+            with open(self.file_path, 'r', encoding='utf-8') as f:
+                if not self.chunked:
+                    self.emit_chunk(f.read(), 100)
+                else:
+                    while not self.cancelled:
+                        chunk = f.read(self.CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        # Позиция буфера чуть опережает прочитанный текст, для индикатора этого достаточно
+                        self.emit_chunk(chunk, min(99, f.buffer.tell() * 100 // size))
+            # Заодно компилируем грамматику, пока поток GUI занят вставкой текста
+            if self.extension_manager and not self.cancelled:
+                self.extension_manager.get_rule_set_for_file(self.file_path)
+        except Exception as e:
+            if not self.cancelled:
+                self.signals.failed.emit(str(e))
+            return
+        if not self.cancelled:
+            self.signals.finished.emit()
@@ -0,0 +1,78 @@
+from PySide6 import QtCore
+import itertools
+import os
+import shutil
+import tempfile
+import threading
+
+# Отдельный пул, чтобы сохранения не ждали в очереди за загрузками файлов
+SAVE_POOL = QtCore.QThreadPool()
+_tokens = itertools.count(1)
+
+
+def write_atomic(file_path, text):
+    """Пишет текст во временный файл рядом с целью, fsync и переименовывает.
+
+    Если запись прервётся, исходный файл останется нетронутым.
+    """
+    target = os.path.realpath(file_path)
+    directory = os.path.dirname(target)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(target)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(target):
+            shutil.copymode(target, tmp_path)
+        else:
+            os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, target)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    # Переименование тоже должно пережить сбой питания
+    if hasattr(os, "O_DIRECTORY"):
+        try:
+            dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+        except OSError:
+            pass
+
+
+class FileSaverSignals(QtCore.QObject):
+    finished = QtCore.Signal(int, int)      # токен сохранения, ревизия документа
+    failed = QtCore.Signal(int, str)        # токен сохранения, текст ошибки
+
+
+class FileSaver(QtCore.QRunnable):
+    """Сохраняет снимок текста документа в SAVE_POOL"""
+
+    def __init__(self, file_path, text, revision):
+        super().__init__()
+        self.token = next(_tokens)
+        self.file_path = file_path
+        self.text = text
+        self.revision = revision
+        self.signals = FileSaverSignals()
+        self.done = threading.Event()
+
+    def start(self):
+        SAVE_POOL.start(self)
+
+    def run(self):
+        try:
+            write_atomic(self.file_path, self.text)
+        except Exception as e:
+            self.signals.failed.emit(self.token, str(e))
+        else:
+            self.signals.finished.emit(self.token, self.revision)
+        finally:
+            self.text = None
+            self.done.set()
@@ -0,0 +1,191 @@
+from PySide6 import QtCore
+from utils.ignore_rules import IgnoreRules, looks_binary
+import itertools
+import threading
+import time
+
+_tokens = itertools.count(1)
+
+
+class FileSearchSignals(QtCore.QObject):
+    batch_queued = QtCore.Signal(int)            # токен поиска
+    walk_finished = QtCore.Signal(int)           # токен поиска
+    batch_done = QtCore.Signal(int, int, object)  # токен, просмотрено файлов, [(путь, совпадения)]
+
+
+class FileWalker(QtCore.QRunnable):
+    """Обходит дерево проекта (или список кандидатов из индекса) и раздаёт файлы пачками в пул поиска"""
+
+    BATCH_SIZE = 64
+
+    def __init__(self, token, root, regex, cancelled, pool, signals, candidates=None):
+        super().__init__()
+        self.token = token
+        self.root = root
+        self.candidates = candidates
+        self.regex = regex
+        self.cancelled = cancelled
+        self.pool = pool
+        self.signals = signals
+
+    def run(self):
+        batch = []
+        paths = self.candidates if self.candidates is not None else IgnoreRules(self.root).walk(self.cancelled)
+        for path in paths:
+            if self.cancelled.is_set():
+                break
+            batch.append(path)
+            if len(batch) >= self.BATCH_SIZE:
+                self.queue(batch)
+                batch = []
+        if batch and not self.cancelled.is_set():
+            self.queue(batch)
+        self.signals.walk_finished.emit(self.token)
+
+    def queue(self, paths):
+        self.signals.batch_queued.emit(self.token)
+        self.pool.start(FileSearchBatch(self.token, paths, self.regex, self.cancelled, self.signals))
+
+
+class FileSearchBatch(QtCore.QRunnable):
+    """Ищет совпадения в пачке файлов.
+
+    Совпадение — (номер строки, столбец и длина в единицах UTF-16,
+    текст строки); двоичные и слишком большие файлы пропускаются.
+    """
+
+    MAX_FILE_SIZE = 8 * 1024 * 1024
+    MAX_MATCHES_PER_FILE = 1000
+    MAX_PREVIEW = 200
+
+    def __init__(self, token, paths, regex, cancelled, signals):
+        super().__init__()
+        self.token = token
+        self.paths = paths
+        self.regex = regex
+        self.cancelled = cancelled
+        self.signals = signals
+
+    def run(self):
+        results = []
+        searched = 0
+        for path in self.paths:
+            if self.cancelled.is_set():
+                break
+            searched += 1
+            matches = self.search_file(path)
+            if matches:
+                results.append((path, matches))
+        self.signals.batch_done.emit(self.token, searched, results)
+
+    def search_file(self, path):
+        try:
+            with open(path, 'rb') as f:
+                data = f.read(self.MAX_FILE_SIZE + 1)
+        except OSError:
+            return None
+        if len(data) > self.MAX_FILE_SIZE or looks_binary(data):
+            return None
+        text = data.decode('utf-8', errors='replace')
+        matches = []
+        line = 0
+        counted = 0  # до этой позиции переводы строк уже посчитаны
+        for match in self.regex.finditer(text):
+            start, end = match.span()
+            if start == end:
+                continue
+            line += text.count('\n', counted, start)
+            counted = start
+            line_start = text.rfind('\n', 0, start) + 1
+            line_end = text.find('\n', start)
+            if line_end == -1:
+                line_end = len(text)
+            line_text = text[line_start:line_end]
+            column = utf16_length(line_text[:start - line_start])
+            length = utf16_length(text[start:min(end, line_end)])
+            matches.append((line, column, length, line_text[:self.MAX_PREVIEW].rstrip('\r')))
+            if len(matches) >= self.MAX_MATCHES_PER_FILE:
+                break
+        return matches
+
+
+def utf16_length(text):
+    return len(text) if text.isascii() else len(text.encode('utf-16-le')) // 2
+
+
+class FileSearch(QtCore.QObject):
+    """Параллельный поиск по файлам проекта.
+
+    Обход дерева и поиск идут в собственном пуле потоков, результаты
+    приходят пачками по мере готовности. Отмена выставляет флаг, который
+    проверяют все задачи; результаты отменённого поиска отбрасываются
+    по токену.
+    """
+
+    results_found = QtCore.Signal(object)     # [(путь, [(строка, столбец, длина, текст), ...]), ...]
+    progress = QtCore.Signal(int, int)        # просмотрено файлов, найдено совпадений
+    finished = QtCore.Signal(int, int, float)  # файлов, совпадений, секунд
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QtCore.QThreadPool(self)
+        self.signals = FileSearchSignals()
+        self.signals.batch_queued.connect(self.on_batch_queued)
+        self.signals.walk_finished.connect(self.on_walk_finished)
+        self.signals.batch_done.connect(self.on_batch_done)
+        self.token = 0
+        self.cancelled = threading.Event()
+        self.running = False
+
+    def start(self, root, regex, candidates=None):
+        """candidates — заранее отобранные файлы (например, триграммным индексом).
+
+        Перебираются в потоке обхода, поэтому могут быть генератором.
+        """
+        self.cancel()
+        self.token = next(_tokens)
+        self.cancelled = threading.Event()
+        self.running = True
+        self.walking = True
+        self.pending_batches = 0
+        self.files = 0
+        self.matches = 0
+        self.started = time.perf_counter()
+        self.pool.start(FileWalker(self.token, root, regex, self.cancelled, self.pool, self.signals, candidates))
+
+    def cancel(self):
+        if self.running:
+            self.cancelled.set()
+            self.pool.clear()  # ещё не начатые пачки не запускаем
+            self.running = False
+            self.finished.emit(self.files, self.matches, time.perf_counter() - self.started)
+
+    def stop(self):
+        """Отменяет поиск и ждёт потоки — перед закрытием окна"""
+        self.cancel()
+        self.pool.waitForDone()
+
+    def on_batch_queued(self, token):
+        if token == self.token:
+            self.pending_batches += 1
+
+    def on_walk_finished(self, token):
+        if token == self.token:
+            self.walking = False
+            self.check_finished()
+
+    def on_batch_done(self, token, searched, results):
+        if token != self.token or not self.running:
+            return
+        self.pending_batches -= 1
+        self.files += searched
+        self.matches += sum(len(matches) for _, matches in results)
+        if results:
+            self.results_found.emit(results)
+        self.progress.emit(self.files, self.matches)
+        self.check_finished()
+
+    def check_finished(self):
+        if self.running and not self.walking and self.pending_batches == 0:
+            self.running = False
+            self.finished.emit(self.files, self.matches, time.perf_counter() - self.started)
@@ -0,0 +1,165 @@
+from PySide6 import QtGui
+
+# Правила подсветки, внутри которых скобки и двоеточия не считаются кодом
+MASKED_RULES = ("string", "comment")
+DIRECTIVES = ('#if', '#ifdef', '#ifndef', '#region')
+
+
+class BlockData(QtGui.QTextBlockUserData):
+    """Разбор строки для сворачивания, хранится прямо в блоке документа.
+
+    Заполняется подсветкой, которая знает, где строки и комментарии,
+    а для блоков без подсветки — простым разбором текста в FoldIndex.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.revision = -1  # block.revision(), для которой данные актуальны
+        self.indent = 0
+        self.blank = True   # нет кода: пустая строка, комментарий или часть строки
+        self.opens = 0      # '{' вне строк и комментариев
+        self.closes = 0     # '}' вне строк и комментариев
+        self.kind = None    # 'colon', 'brace', 'directive' или None
+        self.folded = False # область под этим заголовком свёрнута
+
+    def parse(self, text, masked=()):
+        """masked — отсортированные (начало, длина) строк и комментариев"""
+        stripped = text.strip()
+        self.indent = len(text) - len(text.lstrip())
+        code = text
+        if masked:
+            parts = []
+            pos = 0
+            for start, length in masked:
+                parts.append(text[pos:start])
+                parts.append(' ' * length)
+                pos = start + length
+            parts.append(text[pos:])
+            code = ''.join(parts)
+        self.opens = code.count('{')
+        self.closes = code.count('}')
+
+        code = code.strip()
+        # Строки из одних комментариев и продолжений строк не закрывают блок по отступу
+        self.blank = not code
+        if code.endswith(':') and not stripped.startswith(('"""', "'''", '#')):
+            self.kind = 'colon'     # Python: блок по отступу
+        elif code.endswith('{') or code.startswith('{'):
+            self.kind = 'brace'     # C/C++/C#: блок до парной скобки
+        elif code.startswith(DIRECTIVES):
+            self.kind = 'directive'
+        else:
+            self.kind = None
+
+
+class FoldIndex:
+    """Индекс областей сворачивания: начальный блок -> конечный блок.
+
+    Конец области считается по BlockData при первом запросе и кэшируется
+    вместе с номером блока, на котором остановился поиск. Правка в блоке
+    N сбрасывает только области, чей поиск дошёл до N; области выше
+    правки остаются в кэше.
+    """
+
+    def __init__(self, document):
+        self.document = document
+        self.ends = {}  # начальный блок -> (конечный блок или None, блок остановки поиска)
+        self.revision = document.revision()
+        document.contentsChange.connect(self.on_contents_change)
+
+    def on_contents_change(self, position, removed, added):
+        # Подсветка и сворачивание тоже шлют contentsChange, но не меняют ревизию
+        revision = self.document.revision()
+        if revision == self.revision:
+            return
+        self.revision = revision
+        if not self.ends:
+            return
+        changed = self.document.findBlock(position).blockNumber()
+        self.ends = {start: entry for start, entry in self.ends.items() if entry[1] < changed}
+
+    def info(self, block):
+        """BlockData блока; если подсветка его ещё не разобрала — разбираем сами"""
+        data = block.userData()
+        if not isinstance(data, BlockData):
+            data = BlockData()
+            block.setUserData(data)
+        if data.revision != block.revision():
+            data.parse(block.text())
+            data.revision = block.revision()
+        return data
+
+    def is_foldable(self, block):
+        return self.info(block).kind is not None
+
+    def region_end(self, block):
+        """Номер последнего блока области, начинающейся с block, или None"""
+        start = block.blockNumber()
+        entry = self.ends.get(start)
+        if entry is None:
+            entry = self._scan(block)
+            self.ends[start] = entry
+        return entry[0]
+
+    def _scan(self, block):
+        start = block.blockNumber()
+        data = self.info(block)
+        block_count = self.document.blockCount()
+        if data.kind == 'colon':
+            # Область идёт до первой непустой строки с отступом не больше заголовка
+            block = block.next()
+            while block.isValid():
+                next_data = self.info(block)
+                if not next_data.blank and next_data.indent <= data.indent:
+                    stop = block.blockNumber()
+                    return (stop - 1 if stop - 1 > start else None), stop
+                block = block.next()
+            return (block_count - 1 if block_count - 1 > start else None), block_count
+        if data.kind == 'brace':
+            depth = 1
+            block = block.next()
+            while block.isValid():
+                next_data = self.info(block)
+                depth += next_data.opens - next_data.closes
+                if depth <= 0:
+                    number = block.blockNumber()
+                    return number, number
+                block = block.next()
+            return None, block_count
+        return None, start
+
+    def build(self):
+        """Находит все области документа за один проход.
+
+        Даёт те же концы, что и _scan для каждого блока по отдельности,
+        но за O(число блоков); нужно массовым операциям сворачивания.
+        """
+        ends = {}
+        braces = []   # (начальный блок, глубина, при которой область закрывается)
+        indents = []  # (начальный блок, отступ заголовка)
+        depth = 0
+        number = 0
+        block = self.document.begin()
+        while block.isValid():
+            data = self.info(block)
+            if not data.blank:
+                while indents and data.indent <= indents[-1][1]:
+                    start = indents.pop()[0]
+                    ends[start] = (number - 1 if number - 1 > start else None), number
+            depth += data.opens - data.closes
+            while braces and depth <= braces[-1][1]:
+                ends[braces.pop()[0]] = number, number
+            if data.kind == 'colon':
+                indents.append((number, data.indent))
+            elif data.kind == 'brace':
+                braces.append((number, depth - 1))
+            elif data.kind == 'directive':
+                ends[number] = None, number
+            block = block.next()
+            number += 1
+        for start, _ in indents:
+            ends[start] = (number - 1 if number - 1 > start else None), number
+        for start, _ in braces:
+            ends[start] = None, number
+        self.ends = ends
+        return ends
@@ -0,0 +1,74 @@
+import heapq
+import re
+
+
+class FuzzyFileMatcher:
+    """Нечёткий поиск по списку путей для Go to File.
+
+    Путь подходит, если символы запроса встречаются в нём по порядку.
+    Пути хранятся вместе с копией в нижнем регистре, поэтому проверка
+    идёт без IGNORECASE. Запрос, продолжающий
+    предыдущий, проверяет только прошлые совпадения.
+    """
+
+    MAX_RESULTS = 50
+    FULL_SCORE_LIMIT = 2000  # больше совпадений — упорядочиваем только по длине пути
+
+    def __init__(self, paths=()):
+        self.set_paths(paths)
+
+    def set_paths(self, paths):
+        # "путь в нижнем регистре\0путь": \0 не встречается в путях и отделяет копию
+        self.entries = [f"{path.lower()}\0{path}" for path in paths]
+        self.last_query = None
+        self.last_matches = None
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def pattern(query):
+        # [^c\0]*c — без возвратов: каждый символ ищется с места предыдущего
+        return re.compile(''.join(f"[^{re.escape(ch)}\\0]*{re.escape(ch)}" for ch in query))
+
+    def match(self, query):
+        """(число совпадений, лучшие пути) для запроса; пробелы в запросе игнорируются"""
+        query = ''.join(query.lower().split()).replace('\\', '/')
+        if not query:
+            self.last_query = None
+            top = heapq.nsmallest(self.MAX_RESULTS, self.entries, key=len)
+            return len(self.entries), [entry.partition('\0')[2] for entry in top]
+        source = self.entries
+        if self.last_query and query.startswith(self.last_query):
+            source = self.last_matches
+        # Проверка "символ есть в строке" в разы дешевле вызова регулярного
+        # выражения, поэтому сначала отсеиваем пути без какого-то из символов
+        for ch in set(query):
+            source = [entry for entry in source if ch in entry]
+        matches = list(filter(self.pattern(query).match, source))
+        self.last_query = query
+        self.last_matches = matches
+        if len(matches) <= self.FULL_SCORE_LIMIT:
+            name_match = self.pattern(query).match
+            top = heapq.nsmallest(self.MAX_RESULTS, matches,
+                                  key=lambda entry: self.score(entry, query, name_match))
+        else:
+            top = heapq.nsmallest(self.MAX_RESULTS, matches, key=len)
+        return len(matches), [entry.partition('\0')[2] for entry in top]
+
+    @staticmethod
+    def score(entry, query, name_match):
+        """Меньше — лучше: совпадение в имени файла важнее совпадения в каталогах"""
+        lower = entry.partition('\0')[0]
+        name = lower.rpartition('/')[2]
+        if name.startswith(query):
+            rank = 0
+        elif query in name:
+            rank = 1
+        elif name_match(name):
+            rank = 2
+        elif query in lower:
+            rank = 3
+        else:
+            rank = 4
+        return rank, len(lower)
@@ -0,0 +1,153 @@
+import os
+import re
+
+# Служебные каталоги, которые не показываются и не просматриваются никогда
+IGNORED_DIRS = frozenset((
+    '.git', '.hg', '.svn', 'node_modules', '__pycache__', '.venv', 'venv',
+    '.idea', '.vs', '.vscode', '.mypy_cache', '.pytest_cache', '.tox',
+))
+BINARY_SNIFF_SIZE = 8192
+
+
+def looks_binary(data):
+    """Первые байты файла содержат NUL — значит, это не текст"""
+    return b'\0' in data[:BINARY_SNIFF_SIZE]
+
+
+def glob_to_regex(pattern):
+    """Маска .gitignore в регулярное выражение для пути через '/'.
+
+    '*' и '?' не переходят через '/', '**/' — любое число каталогов
+    (в том числе ни одного), '/**' в конце — всё внутри каталога.
+    """
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        ch = pattern[i]
+        if pattern.startswith('**/', i):
+            out.append('(?:.*/)?')
+            i += 3
+        elif pattern.startswith('/**', i) and i + 3 == n:
+            out.append('/.*')
+            i += 3
+        elif ch == '*':
+            while pattern.startswith('*', i):  # прочие '**' — обычная звёздочка
+                i += 1
+            out.append('[^/]*')
+        elif ch == '?':
+            out.append('[^/]')
+            i += 1
+        elif ch == '[':
+            j = i + 1
+            if pattern.startswith(('!', '^'), j):
+                j += 1
+            if pattern.startswith(']', j):
+                j += 1
+            while j < n and pattern[j] != ']':
+                j += 1
+            if j >= n:
+                out.append(r'\[')
+                i += 1
+                continue
+            body = pattern[i + 1:j].replace('\\', r'\\')
+            if body.startswith('!'):
+                body = '^' + body[1:]
+            out.append(f'[{body}]')
+            i = j + 1
+        elif ch == '\\' and i + 1 < n:
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            out.append(re.escape(ch))
+            i += 1
+    return re.compile(''.join(out), re.DOTALL)
+
+
+def is_binary_file(path):
+    try:
+        with open(path, 'rb') as f:
+            return looks_binary(f.read(BINARY_SNIFF_SIZE))
+    except OSError:
+        return True
+
+
+class IgnoreRules:
+    """Правила исключения файлов проекта: служебные каталоги и .gitignore корня.
+
+    Поддерживается основное подмножество синтаксиса .gitignore: маски,
+    '!' для отмены, '/' в конце — только каталоги, '/' в начале или
+    внутри — путь от корня, '**' — любое число каталогов. Побеждает
+    последнее подошедшее правило, как в git.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.rules = []  # (regex, отмена, только каталоги, по пути от корня)
+        self.load(os.path.join(root, '.gitignore'))
+
+    def load(self, gitignore_path):
+        try:
+            with open(gitignore_path, 'r', encoding='utf-8', errors='replace') as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            negate = line.startswith('!')
+            if negate:
+                line = line[1:]
+            # '/' в начале или в середине привязывает маску к корню
+            anchored = line.startswith('/') or '/' in line.rstrip('/')
+            dir_only = line.endswith('/')
+            line = line.strip('/')
+            if not line:
+                continue
+            self.rules.append((glob_to_regex(line), negate, dir_only, anchored))
+
+    def is_ignored(self, rel_path, is_dir=False):
+        """rel_path — путь относительно корня через '/'"""
+        name = rel_path.rsplit('/', 1)[-1]
+        if is_dir and name in IGNORED_DIRS:
+            return True
+        ignored = False
+        for regex, negate, dir_only, anchored in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.fullmatch(rel_path if anchored else name):
+                ignored = not negate
+        return ignored
+
+    def walk(self, cancelled=None, start='', dirs=None):
+        """Пути всех неисключённых файлов под корнем (или под его подкаталогом start).
+
+        Исключённые каталоги не обходятся. В список dirs, если он передан,
+        складываются полные пути пройденных каталогов.
+        """
+        stack = [start]
+        while stack:
+            if cancelled is not None and cancelled.is_set():
+                return
+            rel_dir = stack.pop()
+            if dirs is not None:
+                dirs.append(os.path.join(self.root, rel_dir) if rel_dir else self.root)
+            try:
+                with os.scandir(os.path.join(self.root, rel_dir)) as entries:
+                    entries = list(entries)
+            except OSError:
+                continue
+            for entry in entries:
+                rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                    if not is_dir and not entry.is_file():
+                        continue
+                except OSError:
+                    continue
+                if self.is_ignored(rel_path, is_dir):
+                    continue
+                if is_dir:
+                    stack.append(rel_path)
+                else:
+                    yield entry.path
@@ -0,0 +1,72 @@
+from config import APP_DIR, MANIFEST_FILE
+from utils.file_saver import write_atomic
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+
+
+class ManifestCache:
+    """Разобранные темы и расширения в одном файле MANIFEST_FILE.
+
+    Каждый раздел хранится вместе с mtime папки и всех файлов, из которых
+    он собран. Если ни один mtime не изменился, раздел берётся из кэша:
+    вместо обхода папок и разбора десятков JSON — один файл и несколько
+    stat. Добавление или удаление файла меняет mtime папки, правка —
+    mtime самого файла, и тогда менеджер пересобирает раздел.
+    """
+
+    def __init__(self, path=MANIFEST_FILE):
+        self.path = path
+        self.sections = self.read()
+
+    def read(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+            return {}
+        return data.get("sections", {})
+
+    @staticmethod
+    def stamp(paths):
+        """mtime_ns путей; снимается до разбора файлов, чтобы правка во время разбора не потерялась"""
+        stamps = {}
+        for path in paths:
+            try:
+                stamps[str(path)] = os.stat(path).st_mtime_ns
+            except OSError:
+                stamps[str(path)] = None
+        return stamps
+
+    def get(self, name):
+        """Содержимое раздела, если его файлы не менялись, иначе None"""
+        section = self.sections.get(name)
+        if not section or self.stamp(section["stamp"]) != section["stamp"]:
+            return None
+        return section["payload"]
+
+    def put(self, name, stamp, payload):
+        self.sections[name] = {"stamp": stamp, "payload": payload}
+        try:
+            APP_DIR.mkdir(parents=True, exist_ok=True)
+            write_atomic(self.path, json.dumps({"version": MANIFEST_VERSION, "sections": self.sections},
+                                               ensure_ascii=False))
+        except OSError as e:
+            logger.error("Error writing manifest %s: %s", self.path, e)
+
+
+_manifest = None
+
+
+def get_manifest():
+    """Общий для менеджеров тем и расширений кэш — файл читается один раз"""
+    global _manifest
+    if _manifest is None:
+        _manifest = ManifestCache()
+    return _manifest
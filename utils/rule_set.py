@@ -0,0 +1,136 @@
+from PySide6 import QtCore
+from bisect import bisect_right
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Общий для процесса кэш: (язык, хеш syntaxhighlighter.json) -> RuleSet.
+# Наборы правил могут компилироваться и в потоках загрузки файлов.
+_rule_set_cache = {}
+_rule_set_lock = threading.Lock()
+
+
+def get_rule_set(language, content_hash, syntax_data):
+    """Возвращает скомпилированный набор правил, компилируя его один раз"""
+    key = (language, content_hash)
+    with _rule_set_lock:
+        rule_set = _rule_set_cache.get(key)
+        if rule_set is None:
+            rule_set = RuleSet(syntax_data)
+            _rule_set_cache[key] = rule_set
+        return rule_set
+
+
+def invalidate_rule_sets(valid_keys):
+    """Удаляет из кэша наборы правил, чьих версий грамматик больше нет"""
+    with _rule_set_lock:
+        for key in list(_rule_set_cache):
+            if key not in valid_keys:
+                del _rule_set_cache[key]
+
+
+class RuleSet:
+    """Скомпилированный набор правил подсветки из syntaxhighlighter.json.
+
+    Все правила объединяются в одну альтернацию с именованными группами,
+    поэтому блок сканируется один раз слева направо: побеждает самое левое
+    совпадение, а при равной позиции — правило, объявленное раньше.
+
+    Правила вида {"begin": ..., "end": ...} могут продолжаться на следующих
+    строках: состояние блока 0 означает обычный код, N > 0 — что строка
+    заканчивается внутри правила с индексом N - 1.
+    """
+
+    def __init__(self, syntax_data):
+        self.rule_names = []   # имя правила для каждой альтернативы
+        self._offsets = []     # номер внешней группы каждой альтернативы
+        self._end_patterns = []  # шаблон конца для begin/end правил, иначе None
+        self.pattern = None
+        self._compile(syntax_data.get("rules", []))
+
+    def _compile(self, rules):
+        parts = []
+        group = 1
+        for rule in rules:
+            rule_name = rule.get("ruleName")
+            regex = rule.get("regex") or rule.get("begin")
+            if not regex:
+                continue
+            single = QtCore.QRegularExpression(regex)
+            if not single.isValid():
+                logger.warning("Invalid regex for rule '%s': %s", rule_name, single.errorString())
+                continue
+            end_pattern = None
+            if "begin" in rule and "regex" not in rule:
+                end_pattern = QtCore.QRegularExpression(rule.get("end") or regex)
+                if not end_pattern.isValid():
+                    logger.warning("Invalid end regex for rule '%s': %s", rule_name, end_pattern.errorString())
+                    continue
+            index = len(self.rule_names)
+            parts.append(f"(?<r{index}>{regex})")
+            self.rule_names.append(rule_name)
+            self._offsets.append(group)
+            self._end_patterns.append(end_pattern)
+            # внешняя группа + все группы самого правила
+            group += 1 + single.captureCount()
+
+        if parts:
+            self.pattern = QtCore.QRegularExpression("|".join(parts))
+            self.pattern.optimize()
+
+    def _rule_index(self, match):
+        """Определяет сработавшее правило по последней захваченной группе"""
+        return bisect_right(self._offsets, match.lastCapturedIndex()) - 1
+
+    def _find_end(self, index, text, offset):
+        """Ищет конец многострочного правила, возвращает позицию после него или -1"""
+        match = self._end_patterns[index].match(text, offset)
+        if match.hasMatch():
+            return match.capturedEnd()
+        return -1
+
+    def scan(self, text, state=0):
+        """Сканирует строку текста.
+
+        Возвращает список (start, length, rule_name) и состояние, с которым
+        строка заканчивается.
+        """
+        spans = []
+        pos = 0
+        text_length = len(text)
+
+        # Продолжаем многострочное правило с предыдущей строки
+        if 0 < state <= len(self._end_patterns) and self._end_patterns[state - 1] is not None:
+            index = state - 1
+            end = self._find_end(index, text, 0)
+            if end == -1:
+                if text_length:
+                    spans.append((0, text_length, self.rule_names[index]))
+                return spans, state
+            if end:
+                spans.append((0, end, self.rule_names[index]))
+            pos = end
+
+        if self.pattern is None:
+            return spans, 0
+
+        while pos < text_length:
+            match = self.pattern.match(text, pos)
+            if not match.hasMatch():
+                break
+            start = match.capturedStart()
+            length = match.capturedLength()
+            index = self._rule_index(match)
+            if self._end_patterns[index] is not None:
+                end = self._find_end(index, text, start + length)
+                if end == -1:
+                    spans.append((start, text_length - start, self.rule_names[index]))
+                    return spans, index + 1
+                length = end - start
+            if length <= 0:
+                pos = start + 1
+                continue
+            spans.append((start, length, self.rule_names[index]))
+            pos = start + length
+        return spans, 0
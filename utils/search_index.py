@@ -0,0 +1,307 @@
+from PySide6 import QtCore
+from bisect import bisect_left, bisect_right
+import itertools
+import re
+
+_tokens = itertools.count(1)
+_ASTRAL = re.compile('[\U00010000-\U0010FFFF]')
+
+
+def compile_pattern(text, case_sensitive=False, whole_words=False, regex=False):
+    """Регулярное выражение для запроса; при regex=True текст — уже выражение (может бросить re.error).
+
+    Выражение применяется ко всему тексту документа или файла, поэтому
+    ^ и $ включаются построчно, как в редакторе.
+    """
+    pattern = text if regex else re.escape(text)
+    if whole_words:
+        pattern = rf'\b(?:{pattern})\b'
+    flags = 0 if case_sensitive else re.IGNORECASE
+    if regex:
+        flags |= re.MULTILINE
+    return re.compile(pattern, flags)
+
+
+def utf16_positions(text, positions):
+    """Переводит индексы символов Python в позиции QTextDocument.
+
+    Документ считает в единицах UTF-16, поэтому каждый символ вне BMP
+    (эмодзи и т.п.) перед позицией сдвигает её на один.
+    """
+    if text.isascii():
+        return positions
+    astral = [m.start() for m in _ASTRAL.finditer(text)]
+    if not astral:
+        return positions
+    return [pos + bisect_left(astral, pos) for pos in positions]
+
+
+def char_position(text, position):
+    """Обратное к utf16_positions: позиция QTextDocument -> индекс символа Python"""
+    if text.isascii():
+        return position
+    astral = [m.start() + i for i, m in enumerate(_ASTRAL.finditer(text))]
+    return position - bisect_left(astral, position)
+
+
+def find_match(text, regex, position, backward=False):
+    """Ближайшее непустое совпадение после (или до) position, по кругу.
+
+    position и результат (начало, конец) — позиции QTextDocument,
+    поиск идёт тем же re, что и индекс, чтобы все пути поиска давали
+    одинаковые совпадения. Возвращает None, если совпадений нет.
+    """
+    position = char_position(text, position)
+    found = None
+    if backward:
+        before = last = None
+        for match in regex.finditer(text):
+            if match.end() == match.start():
+                continue
+            if match.start() < position:
+                before = match
+            elif before is not None:
+                break
+            last = match
+        found = before or last  # по кругу: последнее совпадение в тексте
+    else:
+        for start in (position, 0):
+            for match in regex.finditer(text, start):
+                if match.end() > match.start():
+                    found = match
+                    break
+            if found is not None:
+                break
+    if found is None:
+        return None
+    return tuple(utf16_positions(text, [found.start(), found.end()]))
+
+
+def replace_matches(text, regex, replacement, template=False):
+    """Заменяет все непустые совпадения regex в text за один проход.
+
+    При template=True replacement — шаблон re с группами (\\1, \\g<name>),
+    иначе подставляется как есть. Возвращает (новый текст, число замен).
+    """
+    if not template:
+        return regex.subn(replacement.replace('\\', r'\\'), text)
+    count = 0
+
+    def substitute(match):
+        nonlocal count
+        if match.end() == match.start():
+            return ''  # пустые совпадения не ищутся и не заменяются
+        count += 1
+        return match.expand(replacement)
+
+    return regex.sub(substitute, text), count
+
+
+def changed_span(old, new, chunk=4096):
+    """Границы отличающейся середины двух текстов: (начало, конец в old, конец в new).
+
+    Общие начало и конец сравниваются кусками по chunk символов, чтобы
+    правка затрагивала только то, что действительно изменилось.
+    """
+    limit = min(len(old), len(new))
+    start = 0
+    while start + chunk <= limit and old[start:start + chunk] == new[start:start + chunk]:
+        start += chunk
+    while start < limit and old[start] == new[start]:
+        start += 1
+    limit -= start  # общий конец не должен заходить на общее начало
+    old_end, new_end = len(old), len(new)
+    tail = 0
+    while tail + chunk <= limit and old[old_end - tail - chunk:old_end - tail] == new[new_end - tail - chunk:new_end - tail]:
+        tail += chunk
+    while tail < limit and old[old_end - tail - 1] == new[new_end - tail - 1]:
+        tail += 1
+    return start, len(old) - tail, len(new) - tail
+
+
+class SearchWorkerSignals(QtCore.QObject):
+    finished = QtCore.Signal(int, object)  # токен поиска, (позиции в снимке, начала, концы)
+
+
+class SearchWorker(QtCore.QRunnable):
+    """Ищет все совпадения в снимке текста документа.
+
+    Если переданы candidates, проверяются только эти позиции: так запрос,
+    продолжающий предыдущий, сужает уже найденный список.
+    """
+
+    def __init__(self, token, text, regex, candidates=None):
+        super().__init__()
+        self.token = token
+        self.text = text
+        self.regex = regex
+        self.candidates = candidates
+        self.signals = SearchWorkerSignals()
+
+    def run(self):
+        text = self.text
+        if self.candidates is None:
+            spans = [m.span() for m in self.regex.finditer(text)]
+        else:
+            match = self.regex.match
+            spans = [m.span() for m in map(lambda pos: match(text, pos), self.candidates) if m]
+        spans = [(start, end) for start, end in spans if end > start]
+        offsets = [start for start, _ in spans]
+        starts = utf16_positions(text, offsets)
+        ends = utf16_positions(text, [end for _, end in spans])
+        self.text = None
+        self.signals.finished.emit(self.token, (offsets, starts, ends))
+
+
+class SearchIndex(QtCore.QObject):
+    """Индекс всех совпадений поискового запроса в документе редактора.
+
+    Поиск идёт в пуле потоков по снимку текста. Правки документа сразу
+    сдвигают уже найденные совпадения, а полный пересчёт откладывается
+    на RESCAN_DELAY_MS после последней правки.
+    """
+
+    results_changed = QtCore.Signal()
+
+    RESCAN_DELAY_MS = 300
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.editor = None
+        self.query = None       # (текст, учитывать регистр, целые слова, регулярное выражение)
+        self.regex = None
+        self.error = None       # ошибка в регулярном выражении запроса
+        self.token = 0
+        self.searching = False
+        self.snapshot = None    # текст, по которому найдены совпадения; None — были правки
+        self.pending_snapshot = None
+        self.offsets = []       # начала совпадений в снимке (индексы символов Python)
+        self.starts = []        # начала совпадений в документе
+        self.ends = []          # концы совпадений в документе
+        self.revision = None
+
+        self.rescan_timer = QtCore.QTimer(self)
+        self.rescan_timer.setSingleShot(True)
+        self.rescan_timer.setInterval(self.RESCAN_DELAY_MS)
+        self.rescan_timer.timeout.connect(self.rescan)
+
+    def set_editor(self, editor):
+        if editor is self.editor:
+            return
+        if self.editor is not None:
+            try:
+                self.editor.document().contentsChange.disconnect(self.on_contents_change)
+            except (TypeError, RuntimeError):
+                pass
+        self.editor = editor
+        if editor is not None:
+            editor.document().contentsChange.connect(self.on_contents_change)
+            self.revision = editor.document().revision()
+        self.rescan()
+
+    def set_query(self, text, case_sensitive=False, whole_words=False, regex=False):
+        query = (text, case_sensitive, whole_words, regex)
+        if query == self.query:
+            return
+        # Запрос, продолжающий предыдущий, может совпасть только там же, где и тот
+        narrowing = (self.snapshot is not None and self.query is not None and self.query[0]
+                     and text.startswith(self.query[0]) and query[1:] == self.query[1:]
+                     and not whole_words and not regex)
+        self.query = query
+        self.error = None
+        try:
+            self.regex = compile_pattern(text, case_sensitive, whole_words, regex) if text else None
+        except re.error as e:
+            self.regex = None
+            self.error = str(e)
+            narrowing = False
+        if narrowing:
+            self.start_search(self.snapshot, self.offsets)
+        else:
+            self.rescan()
+
+    def clear(self):
+        self.token = next(_tokens)
+        self.searching = False
+        self.snapshot = None
+        self.offsets, self.starts, self.ends = [], [], []
+
+    def rescan(self):
+        self.rescan_timer.stop()
+        if self.editor is None or self.regex is None:
+            self.clear()
+            self.results_changed.emit()
+            return
+        self.start_search(self.editor.toPlainText())
+
+    def start_search(self, text, candidates=None):
+        self.token = next(_tokens)
+        self.searching = True
+        self.pending_snapshot = text
+        worker = SearchWorker(self.token, text, self.regex, candidates)
+        worker.signals.finished.connect(self.on_search_finished)
+        QtCore.QThreadPool.globalInstance().start(worker)
+        self.results_changed.emit()
+
+    def on_search_finished(self, token, result):
+        if token != self.token:
+            return  # запрос или документ уже изменились
+        self.searching = False
+        self.snapshot = self.pending_snapshot
+        self.pending_snapshot = None
+        self.offsets, self.starts, self.ends = result
+        self.results_changed.emit()
+
+    def on_contents_change(self, position, removed, added):
+        # Перерисовка подсветки тоже шлёт contentsChange, но не меняет ревизию
+        revision = self.editor.document().revision()
+        if revision == self.revision:
+            return
+        self.revision = revision
+        if self.regex is None:
+            return
+        # Совпадения до правки остаются, задетые ею выбрасываются, после — сдвигаются
+        delta = added - removed
+        left = bisect_right(self.ends, position)
+        right = max(left, bisect_left(self.starts, position + removed))
+        self.starts = self.starts[:left] + [start + delta for start in self.starts[right:]]
+        self.ends = self.ends[:left] + [end + delta for end in self.ends[right:]]
+        self.offsets = []
+        self.snapshot = None
+        self.token = next(_tokens)  # результат поиска, начатого до правки, устарел
+        self.searching = True
+        self.rescan_timer.start()
+        self.results_changed.emit()
+
+    # --- запросы ---
+
+    def is_ready(self):
+        return self.regex is not None and not self.searching
+
+    def count(self):
+        return len(self.starts)
+
+    def match(self, index):
+        return self.starts[index], self.ends[index]
+
+    def index_of(self, start, end):
+        """Номер совпадения, точно занимающего start..end, или -1"""
+        index = bisect_left(self.starts, start)
+        if index < len(self.starts) and self.starts[index] == start and self.ends[index] == end:
+            return index
+        return -1
+
+    def next_index(self, position, backward=False):
+        """Номер ближайшего совпадения после (или до) position, по кругу"""
+        if not self.starts:
+            return -1
+        if backward:
+            return (bisect_left(self.starts, position) - 1) % len(self.starts)
+        index = bisect_left(self.starts, position)
+        return index if index < len(self.starts) else 0
+
+    def matches_between(self, first, last):
+        """Совпадения, пересекающие диапазон позиций first..last"""
+        left = bisect_right(self.ends, first)
+        right = bisect_left(self.starts, last)
+        return list(zip(self.starts[left:right], self.ends[left:right]))
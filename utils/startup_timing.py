@@ -0,0 +1,31 @@
+import time
+
+
+class StartupTimer:
+    """Длительность фаз запуска; отчёт выводится по флагу --startup-timing"""
+
+    def __init__(self):
+        self.started = self.last = time.perf_counter()
+        self.phases = []
+
+    def start(self, started):
+        """Отсчёт с момента запуска процесса, а не импорта модуля"""
+        self.started = self.last = started
+        self.phases.clear()
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, (now - self.last) * 1000))
+        self.last = now
+
+    def report(self):
+        width = max((len(phase) for phase, _ in self.phases), default=0)
+        lines = ["Startup timing:"]
+        total = 0.0
+        for phase, ms in self.phases:
+            total += ms
+            lines.append(f"  {phase:<{width}}  {ms:7.1f} ms  (at {total:7.1f} ms)")
+        return '\n'.join(lines)
+
+
+STARTUP_TIMER = StartupTimer()
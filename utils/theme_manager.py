@@ -1,6 +1,11 @@
 from PySide6 import QtGui, QtCore
 from config import THEMES_DIR, BASE_THEMES
+from .manifest_cache import get_manifest
 import json
+import logging
+
+logger = logging.getLogger(__name__)
+
 
 class ThemeManager(QtCore.QObject):
     """Менеджер тем с поддержкой сигналов об изменениях"""
@@ -16,28 +21,16 @@ class ThemeManager(QtCore.QObject):
         self.load_themes()
 
     def load_themes(self):
-        """Загружает все темы из папки"""
-        THEMES_DIR.mkdir(parents=True, exist_ok=True)
-        
-        # Создаём базовые темы, если их нет
-        for name, data in BASE_THEMES.items():
-            theme_path = THEMES_DIR / name
-            if not theme_path.exists():
-                with open(theme_path, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, indent=4)
+        """Загружает все темы: из манифеста, если папка тем не менялась, иначе из файлов"""
+        manifest = get_manifest()
+        loaded = manifest.get("themes")
+        if loaded is None:
+            loaded = self.scan_themes(manifest)
 
-        # Загружаем все темы из папки
         old_themes = set(self.themes.keys())
         self.themes.clear()
-        
-        for theme_file in THEMES_DIR.glob("*.json"):
-            try:
-                with open(theme_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    theme_name = data.get("name", theme_file.stem)
-                    self.themes[theme_name] = data
-            except Exception as e:
-                print(f"Error loading theme {theme_file}: {e}")
+        for theme_name, data in loaded:
+            self.themes[theme_name] = data
         
         # Проверяем, изменился ли список тем
         new_themes = set(self.themes.keys())
@@ -52,6 +45,30 @@ class ThemeManager(QtCore.QObject):
             first_theme = list(self.themes.keys())[0]
             self.set_theme(first_theme, save_to_config=False)
 
+    def scan_themes(self, manifest):
+        """Читает темы из папки и запоминает их в манифесте"""
+        THEMES_DIR.mkdir(parents=True, exist_ok=True)
+        
+        # Создаём базовые темы, если их нет
+        for name, data in BASE_THEMES.items():
+            theme_path = THEMES_DIR / name
+            if not theme_path.exists():
+                with open(theme_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, indent=4)
+
+        theme_files = list(THEMES_DIR.glob("*.json"))
+        stamp = manifest.stamp([THEMES_DIR, *theme_files])
+        loaded = []
+        for theme_file in theme_files:
+            try:
+                with open(theme_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                    loaded.append((data.get("name", theme_file.stem), data))
+            except Exception as e:
+                logger.error("Error loading theme %s: %s", theme_file, e)
+        manifest.put("themes", stamp, loaded)
+        return loaded
+
     def get_color(self, key, default="#000000"):
         """Возвращает цвет из текущей темы"""
         if self.current_theme and "colors" in self.current_theme:
@@ -0,0 +1,602 @@
+from PySide6 import QtCore
+from config import INDEX_DIR
+from utils.ignore_rules import IgnoreRules, looks_binary
+import hashlib
+import logging
+import os
+import pickle
+import re
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+
+
+def text_trigrams(text):
+    """Все тройки символов текста в нижнем регистре, не пересекающие перевод строки"""
+    grams = set()
+    # Одинаковые строки (отступы, скобки, импорты) разбираются один раз
+    for line in set(text.lower().split('\n')):
+        grams.update(line[i:i + 3] for i in range(len(line) - 2))
+    return grams
+
+
+_QUANTIFIER = re.compile(r'[*+?]|\{(?:\d+(?:,\d*)?|,\d+)\}')
+_GROUP_START = re.compile(r'\((?:\?:|\?P<\w+>|\?[aiLmsux]*-?[imsx]*:)?')
+_GLOBAL_FLAGS = re.compile(r'\(\?[aiLmsux]+\)')
+_LITERAL_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'f': '\f', 'v': '\v', 'a': '\a'}
+
+
+def class_end(pattern, i):
+    """Позиция сразу за классом символов [...], начинающимся в i"""
+    j = i + 1
+    if pattern.startswith('^', j):
+        j += 1
+    if pattern.startswith(']', j):
+        j += 1
+    while j < len(pattern) and pattern[j] != ']':
+        j += 2 if pattern[j] == '\\' else 1
+    return j + 1
+
+
+def literal_runs(pattern):
+    """Куски текста, которые обязательно входят в любое совпадение регулярного выражения.
+
+    Учитываются литералы вне классов символов, в том числе внутри обычных
+    групп; повторы и необязательные группы прерывают кусок или отбрасывают
+    его. None — выражение не разобрать или в нём есть конструкции
+    (альтернативы, просмотр вперёд и назад, режим x), при которых
+    обязательных кусков не выделить: тогда проверяются все файлы.
+    """
+    try:
+        re.compile(pattern)
+    except re.error:
+        return None
+    groups = [[]]  # куски на каждом уровне вложенности скобок
+    current = []
+
+    def end_run():
+        groups[-1].append(''.join(current))
+        current.clear()
+
+    i, n = 0, len(pattern)
+    while i < n:
+        ch = pattern[i]
+        if ch == '\\':
+            escaped = pattern[i + 1]
+            if not escaped.isalnum() and not escaped.isspace():
+                atom = escaped
+            elif escaped in _LITERAL_ESCAPES:
+                atom = _LITERAL_ESCAPES[escaped]
+            elif escaped in 'dDwWsSbBAZ':
+                atom = None
+            else:
+                return None  # \x41, \N{...}, ссылки на группы
+            i += 2
+        elif ch == '[':
+            atom = None
+            i = class_end(pattern, i)
+        elif ch == '(':
+            flags = _GLOBAL_FLAGS.match(pattern, i)
+            if flags:
+                if 'x' in flags.group():
+                    return None
+                i = flags.end()
+                continue
+            group = _GROUP_START.match(pattern, i)
+            if group.end() == i + 1 and pattern.startswith('(?', i) or 'x' in group.group():
+                return None
+            end_run()
+            groups.append([])
+            i = group.end()
+            continue
+        elif ch == ')':
+            end_run()
+            inner = groups.pop()
+            i += 1
+            quantifier = _QUANTIFIER.match(pattern, i)
+            if quantifier:
+                i = quantifier.end()
+                if pattern.startswith(('?', '+'), i):
+                    i += 1
+            if not quantifier or quantifier.group() == '+':
+                groups[-1].extend(inner)
+            continue
+        elif ch == '|':
+            return None
+        elif ch in '.^$':
+            atom = None
+            i += 1
+        else:
+            atom = ch
+            i += 1
+        quantifier = _QUANTIFIER.match(pattern, i)
+        if quantifier:
+            # a+ — хотя бы одна a, a* и a? — возможно, ни одной
+            if atom is not None and quantifier.group() == '+':
+                current.append(atom)
+            end_run()
+            i = quantifier.end()
+            if pattern.startswith(('?', '+'), i):
+                i += 1
+        elif atom is None:
+            end_run()
+        else:
+            current.append(atom)
+    end_run()
+    if len(groups) != 1:
+        return None
+    return [run for run in groups[0] if len(run) >= 3]
+
+
+class TrigramIndexRefresher(QtCore.QRunnable):
+    def __init__(self, index, token, dirs=None, paths=None):
+        super().__init__()
+        self.index = index
+        self.token = token
+        self.dirs = dirs
+        self.paths = paths
+
+    def run(self):
+        if self.paths is not None:
+            self.index.update_files(self.token, self.paths)
+        else:
+            self.index.refresh(self.token, self.dirs)
+
+
+class TrigramIndexSaver(QtCore.QRunnable):
+    def __init__(self, index, token):
+        super().__init__()
+        self.index = index
+        self.token = token
+
+    def run(self):
+        self.index.save(self.token)
+
+
+class TrigramIndex(QtCore.QObject):
+    """Триграммный индекс файлов корня проекта для поиска по файлам.
+
+    Для каждой тройки символов (в нижнем регистре) хранится множество
+    файлов, где она встречается; поиск проверяет регулярным выражением
+    только файлы, содержащие все тройки запроса. Индекс лежит в
+    INDEX_DIR и при следующем запуске обновляется по размеру и mtime:
+    перечитываются только изменившиеся файлы. Изменения на лету приходят
+    от QFileSystemWatcher по каталогам и от сохранений редактора.
+
+    Тройки строятся только для корня, открытого пользователем, или после
+    первого поиска по файлам (enable_contents); для корня по умолчанию
+    (текущей папки при запуске) ведётся только список файлов для Go to
+    File, и на диск он не пишется. С index_contents=False (настройка
+    project_index) тройки не строятся никогда. Если в корне больше
+    MAX_FILES файлов или MAX_CONTENT_BYTES текста, тройки отбрасываются
+    и поиск по файлам проверяет все файлы.
+
+    На диск индекс пишется целиком, поэтому не после каждого изменения,
+    а через SAVE_DELAY_MS после последнего и при закрытии (stop).
+
+    Изменённый файл не вычищается из старых троек, а только дописывается:
+    лишний кандидат отсеется при проверке, а пропусков не будет. Когда
+    таких файлов набирается много, индекс перестраивается целиком.
+
+    Наблюдатель каталогов не замечает правки файла на месте и не следит
+    за каталогами сверх MAX_WATCHED_DIRS, поэтому запрос сверяет размер
+    и mtime файлов, не прошедших по тройкам, и обходит ненаблюдаемые
+    каталоги: такие файлы тоже попадают в кандидаты и переиндексируются.
+    """
+
+    stats_changed = QtCore.Signal()
+    files_changed = QtCore.Signal()  # добавились или пропали файлы
+    dirs_indexed = QtCore.Signal(int, object)  # токен, каталоги для наблюдения
+    save_requested = QtCore.Signal()
+
+    MAX_FILE_SIZE = 8 * 1024 * 1024  # как у поиска: большие файлы не ищутся вовсе
+    MAX_FILES = 100000
+    MAX_CONTENT_BYTES = 512 * 1024 * 1024
+    MAX_WATCHED_DIRS = 4096
+    UPDATE_DELAY_MS = 500
+    SAVE_DELAY_MS = 30000
+
+    def __init__(self, parent=None, index_contents=True):
+        super().__init__(parent)
+        self.index_contents = index_contents
+        self.lock = threading.Lock()
+        self.pool = QtCore.QThreadPool(self)
+        self.pool.setMaxThreadCount(1)  # обновления идут строго по очереди
+        self.root = None
+        self.token = 0
+        self.ready = False
+        self.contents_wanted = False  # тройки нужны для текущего корня
+        self.contents = False         # в индексе есть тройки (меняется в потоке пула)
+        self.over_limit = False
+        self.paths_version = 0
+        self.reset()
+        self.build_seconds = 0.0
+        self.size_bytes = 0
+        self.query_ms = 0.0
+
+        self.watcher = QtCore.QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.on_directory_changed)
+        self.dirs_indexed.connect(self.watch_dirs)
+        self.unwatched_dirs = set()  # каталоги сверх лимита наблюдателя
+        self.dirty_dirs = set()
+        self.update_timer = QtCore.QTimer(self)
+        self.update_timer.setSingleShot(True)
+        self.update_timer.setInterval(self.UPDATE_DELAY_MS)
+        self.update_timer.timeout.connect(self.update_dirty_dirs)
+        self.save_timer = QtCore.QTimer(self)
+        self.save_timer.setSingleShot(True)
+        self.save_timer.setInterval(self.SAVE_DELAY_MS)
+        self.save_timer.timeout.connect(lambda: self.pool.start(TrigramIndexSaver(self, self.token)))
+        self.save_requested.connect(self.save_timer.start)
+
+    def reset(self):
+        self.paths = {}     # путь -> номер файла
+        self.names = {}     # номер файла -> путь
+        self.stamps = {}    # номер файла -> (размер, mtime_ns)
+        self.postings = {}  # тройка -> множество номеров файлов
+        self.next_id = 1
+        self.stale = 0      # файлов, чьи старые тройки остались в индексе
+        self.content_bytes = 0
+        self.changed = False
+        self.paths_version += 1  # меняется при добавлении и удалении файлов
+
+    def index_path(self):
+        digest = hashlib.sha1(os.path.normcase(self.root).encode('utf-8')).hexdigest()[:16]
+        return INDEX_DIR / f"{digest}.pickle"
+
+    def set_root(self, root, contents=True):
+        """contents=False — только список файлов, пока не понадобится поиск (enable_contents)"""
+        root = os.path.abspath(root)
+        if root == self.root:
+            if contents:
+                self.enable_contents()
+            return
+        self.token += 1
+        self.root = root
+        self.ready = False
+        self.contents_wanted = contents and self.index_contents
+        self.over_limit = False
+        self.dirty_dirs.clear()
+        self.unwatched_dirs.clear()
+        self.update_timer.stop()
+        paths = self.watcher.directories()
+        if paths:
+            self.watcher.removePaths(paths)
+        with self.lock:
+            self.reset()
+            self.contents = False
+        self.pool.start(TrigramIndexRefresher(self, self.token))
+
+    def enable_contents(self):
+        """Начинает строить тройки для текущего корня, если они ещё не строятся"""
+        if self.root is None or not self.index_contents or self.contents_wanted or self.over_limit:
+            return
+        self.token += 1
+        self.ready = False
+        self.contents_wanted = True
+        self.pool.start(TrigramIndexRefresher(self, self.token))
+
+    def stop(self):
+        """Прерывает обновление, ждёт поток и дописывает отложенные изменения — перед закрытием окна"""
+        self.token += 1
+        self.pool.clear()
+        self.pool.waitForDone()
+        self.save_timer.stop()
+        self.save(self.token)
+
+    def is_ready_for(self, root):
+        return self.ready and root is not None and os.path.abspath(root) == self.root
+
+    # --- обновление (в потоке пула) ---
+
+    def refresh(self, token, dirs=None):
+        if token != self.token:
+            return
+        started = time.perf_counter()
+        paths_version = self.paths_version
+        rules = IgnoreRules(self.root)
+        if dirs is None:
+            if self.contents_wanted and not self.over_limit and not self.contents:
+                # Тройки для этого корня ещё не строились: сохранённый индекс или все файлы заново
+                if not self.load(token):
+                    with self.lock:
+                        self.stamps = {}
+                        self.postings = {}
+                        self.stale = 0
+                        self.content_bytes = 0
+                self.contents = True
+            if self.stale > max(1000, len(self.paths) // 4):
+                with self.lock:
+                    self.reset()  # накопилось много устаревших троек — собираем заново
+            starts = ['']
+        else:
+            starts = []
+            for directory in dirs:
+                rel_dir = os.path.relpath(directory, self.root).replace(os.sep, '/')
+                if rel_dir == '.':
+                    rel_dir = ''
+                if rel_dir.startswith('..') or (rel_dir and rules.is_ignored(rel_dir, True)):
+                    continue
+                starts.append(rel_dir)
+
+        seen = set()
+        visited_dirs = []
+        truncated = False
+        for start in starts:
+            for path in rules.walk(start=start, dirs=visited_dirs):
+                if token != self.token:
+                    return
+                seen.add(path)
+                self.update_file(path)
+                if self.contents and self.content_bytes > self.MAX_CONTENT_BYTES:
+                    self.drop_contents()
+                if len(self.paths) >= self.MAX_FILES:
+                    truncated = True
+                    break
+            if truncated:
+                self.drop_contents()
+                break
+        # Файлы, пропавшие из обойдённых каталогов, из индекса убираем
+        prefixes = tuple(os.path.join(self.root, start, '') for start in starts)
+        with self.lock:
+            missing = [] if truncated else [p for p in self.paths if p.startswith(prefixes) and p not in seen]
+            for path in missing:
+                file_id = self.paths.pop(path)
+                del self.names[file_id]
+                del self.stamps[file_id]
+                self.stale += 1
+                self.changed = True
+                self.paths_version += 1
+
+        if self.changed:
+            self.save_requested.emit()
+        if dirs is None:
+            self.build_seconds = time.perf_counter() - started
+            self.ready = True
+        # Новые каталоги тоже берутся под наблюдение, пока хватает лимита
+        self.dirs_indexed.emit(token, visited_dirs)
+        if self.paths_version != paths_version or dirs is None:
+            self.files_changed.emit()
+        self.stats_changed.emit()
+
+    def drop_contents(self):
+        """Корень слишком велик для индекса содержимого: остаётся только список файлов"""
+        if self.contents:
+            logger.info("Project %s exceeds the index limits, searching without the index", self.root)
+        self.over_limit = True
+        with self.lock:
+            self.contents = False
+            self.postings = {}
+            self.stale = 0
+            self.changed = False
+
+    def update_file(self, path):
+        """Переиндексирует файл, если его размер или mtime изменились"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return
+        stamp = (stat.st_size, stat.st_mtime_ns)
+        file_id = self.paths.get(path)
+        if file_id is not None and self.stamps.get(file_id) == stamp:
+            return
+        grams = ()
+        if self.contents and stat.st_size <= self.MAX_FILE_SIZE:
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read(self.MAX_FILE_SIZE + 1)
+            except OSError:
+                return
+            self.content_bytes += len(data)
+            if not looks_binary(data):
+                grams = text_trigrams(data.decode('utf-8', errors='replace'))
+        with self.lock:
+            if file_id is None:
+                file_id = self.next_id
+                self.next_id += 1
+                self.paths[path] = file_id
+                self.names[file_id] = path
+                self.paths_version += 1
+            elif file_id in self.stamps:
+                self.stale += 1
+            postings = self.postings
+            for gram in grams:
+                ids = postings.get(gram)
+                if ids is None:
+                    postings[gram] = {file_id}
+                else:
+                    ids.add(file_id)
+            self.stamps[file_id] = stamp
+            self.changed = True
+
+    def update_files(self, token, paths):
+        """Переиндексирует файлы, изменения которых заметил запрос"""
+        for path in paths:
+            if token != self.token:
+                return
+            self.update_file(path)
+        if self.changed:
+            self.save_requested.emit()
+        self.stats_changed.emit()
+
+    def load(self, token):
+        """Читает сохранённый индекс корня; False — его нет или он не подходит"""
+        try:
+            with open(self.index_path(), 'rb') as f:
+                data = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError, AttributeError):
+            return False
+        if (data.get("version") != INDEX_VERSION or data.get("root") != self.root
+                or data.get("contents") is not True or token != self.token):
+            return False
+        with self.lock:
+            self.paths = data["paths"]
+            self.names = {file_id: path for path, file_id in self.paths.items()}
+            self.stamps = data["stamps"]
+            self.postings = data["postings"]
+            self.next_id = data["next_id"]
+            self.stale = data["stale"]
+            self.content_bytes = sum(size for size, _ in self.stamps.values())
+            self.paths_version += 1
+        self.size_bytes = os.path.getsize(self.index_path())
+        return True
+
+    def save(self, token):
+        """Пишет индекс на диск; вызывается в потоке пула или после его остановки"""
+        if token != self.token or not self.changed or not self.contents:
+            return  # список файлов без троек не сохраняется
+        with self.lock:
+            state = {
+                "version": INDEX_VERSION, "root": self.root, "contents": True,
+                "paths": self.paths,
+                "stamps": self.stamps, "postings": self.postings,
+                "next_id": self.next_id, "stale": self.stale,
+            }
+            target = self.index_path()
+            self.changed = False
+        # Сериализация без блокировки: словари меняет только поток пула, то есть
+        # этот же поток, а запросы из GUI на время записи не останавливаются
+        data = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+        try:
+            INDEX_DIR.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix=f".{target.name}.", suffix=".tmp", dir=INDEX_DIR)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, target)
+            self.size_bytes = len(data)
+        except OSError as e:
+            logger.error("Error writing search index %s: %s", target, e)
+
+    # --- уведомления об изменениях (поток GUI) ---
+
+    def watch_dirs(self, token, dirs):
+        """Наблюдает каталоги, начиная с верхних; не поместившиеся в лимит запоминает"""
+        if token != self.token or not dirs:
+            return
+        watched = set(self.watcher.directories())
+        added = []
+        for directory in sorted(set(dirs), key=lambda d: (d.count(os.sep), d)):
+            if directory in watched:
+                self.unwatched_dirs.discard(directory)
+            elif len(watched) + len(added) < self.MAX_WATCHED_DIRS:
+                added.append(directory)
+                self.unwatched_dirs.discard(directory)
+            else:
+                self.unwatched_dirs.add(directory)
+        if added:
+            self.watcher.addPaths(added)
+
+    def on_directory_changed(self, path):
+        self.dirty_dirs.add(path)
+        self.update_timer.start()
+
+    def file_changed(self, path):
+        """Файл сохранён редактором: его каталог может и не наблюдаться"""
+        if self.root and path and os.path.abspath(path).startswith(self.root + os.sep):
+            self.on_directory_changed(os.path.dirname(os.path.abspath(path)))
+
+    def update_dirty_dirs(self):
+        if not self.dirty_dirs or self.root is None:
+            return
+        dirs = sorted(self.dirty_dirs)
+        self.dirty_dirs.clear()
+        # Вложенные каталоги обходятся вместе с родителем
+        roots = [d for i, d in enumerate(dirs)
+                 if not any(d.startswith(parent + os.sep) for parent in dirs[:i])]
+        self.pool.start(TrigramIndexRefresher(self, self.token, roots))
+
+    # --- запросы ---
+
+    def candidates(self, text, regex=False):
+        """Пути файлов, где может быть совпадение, или None — проверять все.
+
+        Возвращается генератор для потока обхода поиска: сначала файлы со
+        всеми тройками запроса, затем те, что изменились после индексации
+        или лежат в ненаблюдаемых каталогах. Здесь, в потоке GUI, только
+        пересекаются множества троек.
+        """
+        if not self.contents:
+            return None
+        started = time.perf_counter()
+        pieces = literal_runs(text) if regex else [text]
+        grams = set()
+        for piece in pieces or ():
+            for line in piece.lower().split('\n'):
+                grams.update(line[i:i + 3] for i in range(len(line) - 2))
+        if not grams:
+            self.query_ms = (time.perf_counter() - started) * 1000
+            return None
+        with self.lock:
+            sets = []
+            for gram in grams:
+                ids = self.postings.get(gram)
+                if not ids:
+                    sets = None
+                    break
+                sets.append(ids)
+            if sets is None:
+                found = set()
+            else:
+                sets.sort(key=len)
+                found = set(sets[0]).intersection(*sets[1:])
+            names = self.names
+            matched = sorted(names[file_id] for file_id in found if file_id in names)
+        # Ненаблюдаемые каталоги заодно перечитываются в индекс
+        unwatched = self.unwatched_dirs
+        roots = [d for d in unwatched if os.path.dirname(d) not in unwatched]
+        if roots:
+            self.dirty_dirs.update(roots)
+            self.update_timer.start()
+        self.query_ms = (time.perf_counter() - started) * 1000
+        return self.iter_candidates(self.token, self.root, matched, found, roots)
+
+    def iter_candidates(self, token, root, matched, found, roots):
+        """Перебирается в потоке обхода поиска, см. candidates"""
+        yield from matched
+        seen = set(matched)
+        # Тройки верны, только пока файл не менялся: правку на месте наблюдатель не видит
+        with self.lock:
+            rest = [(path, self.stamps.get(file_id)) for file_id, path in self.names.items()
+                    if file_id not in found]
+        changed = []
+        for path, stamp in rest:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if (stat.st_size, stat.st_mtime_ns) != stamp:
+                changed.append(path)
+                seen.add(path)
+                yield path
+        if changed:
+            self.pool.start(TrigramIndexRefresher(self, token, paths=changed))
+        # В ненаблюдаемых каталогах могли появиться файлы, которых индекс не знает
+        if roots:
+            rules = IgnoreRules(root)
+            for directory in roots:
+                for path in rules.walk(start=os.path.relpath(directory, root).replace(os.sep, '/')):
+                    if path not in seen:
+                        seen.add(path)
+                        yield path
+
+    def relative_paths(self):
+        """Пути всех файлов относительно корня, через '/'"""
+        prefix = len(os.path.join(self.root, ''))
+        with self.lock:
+            paths = list(self.paths)
+        if os.sep == '/':
+            return [path[prefix:] for path in paths]
+        return [path[prefix:].replace(os.sep, '/') for path in paths]
+
+    def stats(self):
+        return {
+            "files": len(self.paths),
+            "trigrams": len(self.postings),
+            "size_bytes": self.size_bytes,
+            "build_seconds": self.build_seconds,
+            "query_ms": self.query_ms,
+        }
@@ -1,19 +1,40 @@
-from .code_folding_area import CodeFoldingArea
-from .line_number_area import LineNumberArea
-from .code_redactor import CodeEditor
-from .file_tree import FileTreeDock
-from .find_replace_dialog import FindReplaceDialog
-from .tab_widget import TabWidget
-from .theme_dialog import ThemeDialog
-from .extensions_dialog import ExtensionsDialog
+import importlib
+
+# Модули виджетов загружаются при первом обращении к имени: окну при
+# запуске нужны только вкладки и редактор, диалоги и доки — позже
+_modules = {
+    "Gutter": ".gutter",
+    "CodeEditor": ".code_redactor",
+    "LargeFileViewer": ".large_file_viewer",
+    "ProjectTreeModel": ".project_tree_model",
+    "FileTreeDock": ".file_tree",
+    "FindReplaceDialog": ".find_replace_dialog",
+    "FindInFilesDock": ".find_in_files",
+    "QuickOpenDialog": ".quick_open",
+    "TabWidget": ".tab_widget",
+    "ThemeDialog": ".theme_dialog",
+    "ExtensionsDialog": ".extensions_dialog",
+}
 
 __all__ = [
-    "CodeFoldingArea",
-    "LineNumberArea",
+    "Gutter",
     "CodeEditor",
+    "LargeFileViewer",
+    "ProjectTreeModel",
     "FileTreeDock",
     "FindReplaceDialog",
+    "FindInFilesDock",
+    "QuickOpenDialog",
     "TabWidget",
     "ThemeDialog",
     "ExtensionsDialog",
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    module = _modules.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
@@ -1,9 +1,19 @@
 from PySide6 import QtWidgets, QtCore, QtGui
-from widgets.line_number_area import LineNumberArea
-from widgets.code_folding_area import CodeFoldingArea
+from widgets.gutter import Gutter
+from utils.file_loader import FileLoader
+from utils.file_saver import FileSaver, write_atomic
+from utils.edit_journal import EditJournal
+from utils.fold_index import BlockData, FoldIndex
+import logging
 import os
 
+logger = logging.getLogger(__name__)
+
 class CodeEditor(QtWidgets.QPlainTextEdit):
+    load_progress = QtCore.Signal(int)    # процент загрузки файла
+    load_finished = QtCore.Signal(bool)   # файл загружен / ошибка
+    save_finished = QtCore.Signal(str, bool, str)  # путь, успех, текст ошибки
+
     def __init__(self, theme_manager, extension_manager, parent=None):
         super().__init__(parent)
         self.theme_manager = theme_manager
@@ -15,35 +25,60 @@ class CodeEditor(QtWidgets.QPlainTextEdit):
         self.setTabStopDistance(QtGui.QFontMetricsF(self.font()).horizontalAdvance(' ') * 4)
 
         # Folding
-        self.folded_blocks = set()  # номера свёрнутых блоков
-        self.folding_indents = {}   # отступы для свёрнутых блоков
+        self.fold_index = FoldIndex(self.document())
+        # Флаг свёрнутости хранится в BlockData заголовка и сам переезжает
+        # вместе с блоком; курсоры нужны только чтобы найти свёртки при закрытии
+        self.fold_markers = {}  # id(BlockData) -> (BlockData, QTextCursor в начале заголовка)
+        self.document().contentsChange.connect(self.sync_fold_markers)
 
         # Side widgets
-        self.line_number_area = LineNumberArea(self)
-        self.folding_area = CodeFoldingArea(self)
+        self.gutter = Gutter(self)
 
         # Signals
-        self.blockCountChanged.connect(self.update_line_number_area_width)
-        self.updateRequest.connect(self.update_line_number_area)
+        self.blockCountChanged.connect(self.update_gutter_width)
+        self.updateRequest.connect(self.update_gutter)
         self.cursorPositionChanged.connect(self.highlight_current_line)
+        self.verticalScrollBar().valueChanged.connect(self.highlight_visible_blocks)
 
-        self.update_line_number_area_width(0)
+        self.update_gutter_width(0)
+        # Текущая строка рисуется в paintEvent, а не через ExtraSelection
+        self.line_highlight_color = QtGui.QColor(self.theme_manager.get_color("lineHighlight", "#2a2a2a"))
+        self.search_highlight_color = QtGui.QColor(self.theme_manager.get_color("findHighlight", "#613214"))
+        self.current_line_block = QtGui.QTextBlock()
         self.highlight_current_line()
 
-        # Autosave timer
-        self.auto_save_timer = QtCore.QTimer()
-        self.auto_save_timer.setInterval(30000)
-        self.auto_save_timer.timeout.connect(self.auto_save)
-
         self.is_modified = False
         self.document().modificationChanged.connect(self.set_modified)
         self.file_path = None
         self.highlighter = None
 
+        # Фоновая загрузка файла
+        self.loading = False
+        self.loader = None
+        self.pending_goto = None  # (строка, столбец, длина) для перехода после загрузки
+
+        # Фоновое сохранение: одно сохранение в полёте, следующее ждёт его
+        self.saving = None
+        self.pending_save_path = None
+        self.saving_mark = 0  # номер правки в журнале на момент снимка
+
+        # Журнал правок для восстановления после сбоя
+        self.journal = EditJournal()
+        self.journal_revision = self.document().revision()
+        self.pending_journal = None
+        self.document().contentsChange.connect(self.record_change)
+
         # Apply initial theme
+        self.theme_stale = False
         self.apply_theme()
 
     def apply_theme(self):
+        # Фоновые вкладки перекрашиваются при активации (см. showEvent)
+        if not self.isVisible():
+            self.theme_stale = True
+            return
+        self.theme_stale = False
+
         # Обновляем цвета в соответствии с текущей темой
         bg = self.theme_manager.get_color("background", "#1e1e1e")
         fg = self.theme_manager.get_color("foreground", "#d4d4d4")
@@ -56,147 +91,449 @@ class CodeEditor(QtWidgets.QPlainTextEdit):
                 selection-background-color: {sel};
             }}
         """)
-        # Пересоздаём highlighter с новыми цветами
-        if self.file_path:
-            self.set_language_from_file(self.file_path)
+        self.gutter.update_theme()
+        self.line_highlight_color = QtGui.QColor(self.theme_manager.get_color("lineHighlight", "#2a2a2a"))
+        self.search_highlight_color = QtGui.QColor(self.theme_manager.get_color("findHighlight", "#613214"))
+        self.viewport().update()
+        # Правила уже скомпилированы, меняем только форматы и перекрашиваем
+        if self.highlighter:
+            self.highlighter.apply_theme()
+            self.refresh_highlighting()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.theme_stale:
+            self.apply_theme()
+
+    def refresh_highlighting(self):
+        if self.is_large_document():
+            self.highlighter.start_lazy()
+            self.highlight_visible_blocks()
         else:
-            self.highlighter = None
+            self.highlighter.stop_lazy()
+            self.highlighter.rehighlight()
 
     def set_modified(self, modified):
-        self.is_modified = modified
+        # Дописывание загружаемого текста не считается правкой
+        self.is_modified = modified and not self.loading
 
-    def auto_save(self):
-        if self.is_modified and self.file_path:
-            self.save_file(self.file_path)
+    def record_change(self, position, removed, added):
+        # Перерисовка подсветки и сворачивание тоже шлют contentsChange,
+        # но ревизию документа меняют только настоящие правки
+        revision = self.document().revision()
+        if revision == self.journal_revision:
+            return
+        self.journal_revision = revision
+        if self.loading:
+            return
+        text = ""
+        if added:
+            # Изменение в блоке правок может захватывать завершающий разделитель документа
+            end = min(position + added, self.document().characterCount() - 1)
+            cursor = QtGui.QTextCursor(self.document())
+            cursor.setPosition(position)
+            cursor.setPosition(end, QtGui.QTextCursor.MoveMode.KeepAnchor)
+            text = cursor.selectedText().replace('\u2029', '\n')
+        self.journal.record(position, removed, text)
 
-    def save_file(self, file_path):
-        try:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(self.toPlainText())
+    def replay_journal(self, journal):
+        """Восстанавливает несохранённые правки поверх загруженного файла"""
+        if self.loading:
+            self.pending_journal = journal  # применится в finish_load
+        else:
+            journal.apply(self.document())
+
+    def save_file(self, file_path, wait=False):
+        """Сохраняет снимок текста атомарно (временный файл + rename).
+
+        По умолчанию запись идёт в фоновом потоке, а результат приходит
+        сигналом save_finished; с wait=True файл пишется сразу и
+        возвращается результат записи.
+        """
+        if wait:
+            if self.saving:
+                self.saving.done.wait()
+                self.saving = None
+            self.pending_save_path = None
+            revision = self.document().revision()
+            mark = self.journal.mark()
+            try:
+                write_atomic(file_path, self.toPlainText())
+            except Exception as e:
+                self.save_finished.emit(file_path, False, str(e))
+                return False
+            self.mark_saved(file_path, revision, mark)
+            self.save_finished.emit(file_path, True, "")
+            return True
+
+        if self.saving:
+            # Сохранится свежий снимок, когда закончится текущая запись
+            self.pending_save_path = file_path
+            return True
+        self.saving = FileSaver(file_path, self.toPlainText(), self.document().revision())
+        self.saving_mark = self.journal.mark()
+        self.saving.signals.finished.connect(self.on_save_finished)
+        self.saving.signals.failed.connect(self.on_save_failed)
+        self.saving.start()
+        return True
+
+    def mark_saved(self, file_path, revision, mark):
+        # В журнале остаются только правки, сделанные после снимка
+        self.journal.rebase(file_path, mark)
+        # Если текст правили во время записи, документ остаётся изменённым
+        if revision == self.document().revision():
             self.document().setModified(False)
             self.is_modified = False
-            return True
-        except Exception:
-            return False
+
+    def on_save_finished(self, token, revision):
+        if self.saving is None or token != self.saving.token:
+            return
+        file_path = self.saving.file_path
+        self.saving = None
+        self.mark_saved(file_path, revision, self.saving_mark)
+        self.save_finished.emit(file_path, True, "")
+        self.start_pending_save()
+
+    def on_save_failed(self, token, error):
+        if self.saving is None or token != self.saving.token:
+            return
+        file_path = self.saving.file_path
+        self.saving = None
+        self.save_finished.emit(file_path, False, error)
+        self.start_pending_save()
+
+    def start_pending_save(self):
+        if self.pending_save_path:
+            file_path = self.pending_save_path
+            self.pending_save_path = None
+            self.save_file(file_path)
 
     def load_file(self, file_path):
+        """Запускает чтение файла в пуле потоков; текст придёт сигналами.
+
+        Большие файлы (больше stream_load_threshold) приходят кусками,
+        и первый экран виден до окончания загрузки.
+        """
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                self.setPlainText(f.read())
-            self.file_path = file_path
-            self.document().setModified(False)
-            self.is_modified = False
-            self.set_language_from_file(file_path)
-            return True
-        except Exception:
+            size = os.path.getsize(file_path)
+        except OSError:
             return False
+        threshold = self.extension_manager.config.get("stream_load_threshold", 8 * 1024 * 1024)
+        self.file_path = file_path
+        self.loading = True
+        self.clear()
+        self.setPlaceholderText("Loading...")
+        self.setUndoRedoEnabled(False)
+        self.setReadOnly(True)
+
+        self.loader = FileLoader(file_path, size > threshold, self.extension_manager)
+        self.loader.signals.chunk_loaded.connect(self.append_loaded_text)
+        self.loader.signals.finished.connect(self.finish_load)
+        self.loader.signals.failed.connect(self.fail_load)
+        QtCore.QThreadPool.globalInstance().start(self.loader)
+        return True
+
+    def append_loaded_text(self, text, percent):
+        if not self.loading:
+            return
+        if percent == 100 and self.document().isEmpty():
+            self.setPlainText(text)
+        else:
+            cursor = QtGui.QTextCursor(self.document())
+            cursor.movePosition(QtGui.QTextCursor.MoveOperation.End)
+            cursor.insertText(text)
+        self.loader.chunk_consumed()
+        self.load_progress.emit(percent)
+
+    def end_load(self):
+        self.loading = False
+        self.loader = None
+        self.setPlaceholderText("")
+        self.setReadOnly(False)
+        self.setUndoRedoEnabled(True)
+
+    def cancel_load(self):
+        """Прерывает фоновую загрузку (например, при закрытии вкладки)"""
+        if self.loading:
+            self.loader.cancel()
+            self.end_load()
+
+    def fail_load(self, error):
+        logger.error("Error loading %s: %s", self.file_path, error)
+        self.clear()
+        self.end_load()
+        self.document().setModified(False)
+        self.file_path = None
+        self.journal.set_base(None)
+        self.pending_journal = None
+        self.pending_goto = None
+        self.load_finished.emit(False)
+
+    def finish_load(self):
+        if not self.loading:
+            return
+        self.end_load()
+        self.document().setModified(False)
+        self.is_modified = False
+        self.journal.set_base(self.file_path)
+        self.restore_fold_state()
+        if self.pending_journal:
+            self.pending_journal.apply(self.document())
+            self.pending_journal = None
+        self.set_language_from_file(self.file_path)
+        if self.pending_goto:
+            self.goto_line(*self.pending_goto)
+        self.load_finished.emit(True)
+
+    def goto_line(self, line, column=0, length=0):
+        """Ставит курсор на строку line (с нуля) и выделяет length символов от column.
+
+        Пока файл загружается, переход откладывается до finish_load.
+        """
+        if self.loading:
+            self.pending_goto = (line, column, length)
+            return
+        self.pending_goto = None
+        block = self.document().findBlockByNumber(min(line, self.blockCount() - 1))
+        # Строка внутри свёрнутой области: разворачиваем заголовки над ней
+        while not block.isVisible():
+            header = block.previous()
+            while header.isValid() and not header.isVisible():
+                header = header.previous()
+            if not header.isValid() or not self.is_folded(header):
+                break
+            self.toggle_fold(header)
+        start = block.position() + min(column, block.length() - 1)
+        cursor = self.textCursor()
+        cursor.setPosition(start)
+        cursor.setPosition(min(start + length, block.position() + block.length() - 1),
+                           QtGui.QTextCursor.MoveMode.KeepAnchor)
+        self.setTextCursor(cursor)
+        self.centerCursor()
 
     def set_language_from_file(self, file_path):
         ext = os.path.splitext(file_path)[1].lower()
-        print(f"Setting language for file {file_path}, extension: {ext}")  # отладка
+        logger.debug("Setting language for file %s, extension: %s", file_path, ext)
+        rule_set = self.extension_manager.get_rule_set_for_file(file_path)
+        if self.highlighter and rule_set is self.highlighter.rule_set:
+            return  # грамматика не изменилась, подсветка остаётся прежней
         highlighter_class = self.extension_manager.get_highlighter_for_file(file_path, self.theme_manager)
+        if self.highlighter:
+            self.highlighter.stop_lazy()
+            self.highlighter.setDocument(None)
         if highlighter_class:
-            print(f"Found highlighter for {ext}, applying...")  # отладка
+            logger.debug("Found highlighter for %s, applying...", ext)
             self.highlighter = highlighter_class
+            lazy = self.is_large_document()
+            if lazy:
+                self.highlighter.start_lazy()
             self.highlighter.setDocument(self.document())
+            if lazy:
+                self.highlight_visible_blocks()
         else:
-            print(f"No highlighter found for {ext}")  # отладка
+            logger.debug("No highlighter found for %s", ext)
             self.highlighter = None
 
+    def is_large_document(self):
+        """Большие документы подсвечиваются лениво, начиная с видимой области"""
+        threshold = self.extension_manager.config.get("lazy_highlight_threshold", 262144)
+        return self.document().characterCount() > threshold
+
+    def highlight_visible_blocks(self):
+        if self.highlighter and self.highlighter.is_lazy():
+            first = self.firstVisibleBlock().blockNumber()
+            visible = self.viewport().height() // max(1, self.fontMetrics().height()) + 1
+            self.highlighter.ensure_highlighted(first, first + visible)
+
     def is_foldable(self, block):
         """Проверяет, можно ли свернуть блок"""
-        text = block.text().strip()
-        
-        # Python: блоки, заканчивающиеся на :
-        if text.endswith(':') and not text.startswith(('"""', "'''", '#')):
-            return True
-        
-        # C/C++/C#: блоки, начинающиеся с { или заканчивающиеся на {
-        if text.endswith('{') or text.startswith('{'):
-            return True
-            
-        # Препроцессорные директивы
-        if text.startswith(('#if', '#ifdef', '#ifndef', '#region')):
-            return True
-            
-        return False
+        return self.fold_index.is_foldable(block)
 
     def get_fold_region(self, block):
         """Возвращает диапазон строк для сворачивания"""
-        start_block = block
-        start_indent = len(block.text()) - len(block.text().lstrip())
-        
-        # Для Python: ищем конец блока по отступу
-        if block.text().strip().endswith(':'):
-            block = block.next()
-            while block.isValid():
-                text = block.text()
-                if not text.strip():  # пустая строка
-                    block = block.next()
-                    continue
-                current_indent = len(text) - len(text.lstrip())
-                if current_indent <= start_indent:
-                    break
-                block = block.next()
-            return start_block, block.previous()
-        
-        # Для C-подобных: ищем соответствующую закрывающую скобку
-        elif '{' in block.text():
-            brace_count = 1
-            block = block.next()
-            while block.isValid() and brace_count > 0:
-                text = block.text()
-                brace_count += text.count('{')
-                brace_count -= text.count('}')
-                if brace_count == 0:
-                    return start_block, block
-                block = block.next()
-        
-        return start_block, None
+        end = self.fold_index.region_end(block)
+        if end is None:
+            return block, None
+        return block, self.document().findBlockByNumber(end)
 
     def is_folded(self, block):
-        return block.blockNumber() in self.folded_blocks
+        data = block.userData()
+        return isinstance(data, BlockData) and data.folded
+
+    def set_folded(self, block, folded):
+        data = self.fold_index.info(block)
+        data.folded = folded
+        if folded:
+            self.fold_markers[id(data)] = (data, QtGui.QTextCursor(block))
+        else:
+            self.fold_markers.pop(id(data), None)
+
+    def sync_fold_markers(self, position=0, removed=0, added=0):
+        """Переносит флаг за курсором заголовка, если его блок разделили правкой.
+
+        При вставке перевода строки в начало заголовка данные блока остаются
+        у верхней половины, а курсор уезжает вместе с текстом заголовка.
+        """
+        for key, (data, cursor) in list(self.fold_markers.items()):
+            block = cursor.block()
+            if block.userData() is data:
+                continue
+            del self.fold_markers[key]
+            data.folded = False
+            if block.isVisible() and self.is_foldable(block) and not self.is_folded(block):
+                self.set_folded(block, True)
+            else:
+                # Заголовок удалили целиком — скрытые строки больше некому разворачивать
+                last = self.show_hidden_blocks(block)
+                if last:
+                    self.relayout_blocks(block, last)
+
+    def clear_folds(self):
+        for data, _ in self.fold_markers.values():
+            data.folded = False
+        self.fold_markers.clear()
+
+    def folded_lines(self):
+        """Номера строк свёрнутых заголовков (для сохранения между сессиями)"""
+        return sorted(cursor.blockNumber() for _, cursor in self.fold_markers.values())
+
+    def save_fold_state(self):
+        if self.file_path and not self.loading:
+            self.extension_manager.config.set_folds(self.file_path, self.folded_lines())
+
+    def restore_fold_state(self):
+        regions = {}
+        for line in self.extension_manager.config.get_folds(self.file_path):
+            block = self.document().findBlockByNumber(line)
+            if block.isValid():
+                end = self.fold_index.region_end(block)
+                if end is not None:
+                    regions[line] = end
+        if regions:
+            self.apply_folds(regions)
+
+    def fold_block(self, block):
+        start, end = self.get_fold_region(block)
+        if end and end.isValid():
+            self.set_folded(block, True)
+            self.hide_fold_region(start, end)
+            self.relayout_blocks(start, end)
 
     def toggle_fold(self, block):
         """Сворачивает/разворачивает блок"""
-        block_number = block.blockNumber()
-        
-        if block_number in self.folded_blocks:
+        if self.is_folded(block):
             # Разворачиваем
-            self.folded_blocks.remove(block_number)
-            self.show_fold_region(block)
+            self.set_folded(block, False)
+            last = self.show_fold_region(block)
+            if last:
+                self.relayout_blocks(block, last)
         else:
             # Сворачиваем
-            start, end = self.get_fold_region(block)
-            if end and end.isValid():
-                self.folded_blocks.add(block_number)
-                self.hide_fold_region(start, end)
-        
+            self.fold_block(block)
+
         # Принудительно обновляем
-        self.folding_area.update()
-        self.line_number_area.update()
+        self.update_fold_view()
+
+    def fold_all(self):
+        self.apply_folds(self.fold_regions())
+
+    def unfold_all(self):
+        self.apply_folds({})
+
+    def fold_to_level(self, level):
+        """Сворачивает области с вложенностью level и глубже, остальные разворачивает"""
+        self.apply_folds(self.fold_regions(level))
+
+    def fold_regions(self, min_level=1):
+        """Области документа {начало: конец} с вложенностью не меньше min_level"""
+        regions = {}
+        open_ends = []  # концы областей, внутри которых находимся
+        for start, (end, _) in sorted(self.fold_index.build().items()):
+            if end is None:
+                continue
+            while open_ends and open_ends[-1] < start:
+                open_ends.pop()
+            if len(open_ends) + 1 >= min_level:
+                regions[start] = end
+            open_ends.append(end)
+        return regions
+
+    def apply_folds(self, regions):
+        """Сворачивает ровно области regions {начало: конец} за один проход.
+
+        Видимость всех блоков меняется разом, а раскладка пересчитывается
+        один раз в конце, а не после каждой области.
+        """
+        self.clear_folds()
+        hidden_until = -1
+        number = 0
+        block = self.document().begin()
+        while block.isValid():
+            visible = number > hidden_until
+            if block.isVisible() != visible:
+                block.setVisible(visible)
+            end = regions.get(number)
+            if end is not None:
+                self.set_folded(block, True)
+                hidden_until = max(hidden_until, end)
+            block = block.next()
+            number += 1
+        self.relayout_blocks()
+
+        # Курсор не должен остаться в скрытой строке
+        cursor = self.textCursor()
+        block = cursor.block()
+        while not block.isVisible() and block.previous().isValid():
+            block = block.previous()
+        if block != cursor.block():
+            cursor.setPosition(block.position())
+            self.setTextCursor(cursor)
+        self.update_fold_view()
+
+    def relayout_blocks(self, start_block=None, end_block=None):
+        """Пересчитывает раскладку после смены видимости блоков.
+
+        Текст не менялся, поэтому сигналы документа блокируются: иначе
+        подсветка перекрасила бы весь диапазон, а индекс свёрток сбросился бы.
+        """
+        doc = self.document()
+        start = start_block.position() if start_block else 0
+        end = end_block.position() + end_block.length() if end_block else doc.characterCount()
+        blocked = doc.blockSignals(True)
+        doc.markContentsDirty(start, end - start)
+        doc.blockSignals(blocked)
+
+    def update_fold_view(self):
+        self.gutter.update()
         self.viewport().update()
 
     def hide_fold_region(self, start_block, end_block):
         """Скрывает область между start_block и end_block"""
         if not start_block.isValid() or not end_block.isValid():
             return
-        
+
         block = start_block.next()
         while block.isValid() and block.blockNumber() <= end_block.blockNumber():
             block.setVisible(False)
-            # Сохраняем оригинальный отступ для восстановления
-            if block.blockNumber() not in self.folding_indents:
-                indent = len(block.text()) - len(block.text().lstrip())
-                self.folding_indents[block.blockNumber()] = indent
             block = block.next()
 
     def show_fold_region(self, start_block):
-        """Показывает область, начиная с блока после start_block"""
-        block = start_block.next()
+        """Показывает скрытые строки после start_block; вложенные свёртки остаются свёрнутыми"""
+        return self.show_hidden_blocks(start_block.next())
+
+    def show_hidden_blocks(self, block):
+        """Показывает подряд идущие скрытые блоки, начиная с block; возвращает последний"""
+        last = None
         while block.isValid() and not block.isVisible():
             block.setVisible(True)
+            last = block
+            if self.is_folded(block):
+                end = self.fold_index.region_end(block)
+                if end is not None:
+                    block = self.document().findBlockByNumber(end)
+                    last = block
             block = block.next()
+        return last
 
     def keyPressEvent(self, event):
         # Auto-indent and bracket closing
@@ -271,62 +608,57 @@ class CodeEditor(QtWidgets.QPlainTextEdit):
         if indent > 0:
             cursor.insertText(' ' * indent)
 
-    def line_number_width(self):
-        digits = len(str(max(1, self.blockCount())))
-        space = 3 + self.fontMetrics().horizontalAdvance('9') * digits
-        return space
-
-    def update_line_number_area_width(self, new_block_count):
-        self.setViewportMargins(self.line_number_width() + 20, 0, 0, 0)
+    def update_gutter_width(self, new_block_count):
+        self.setViewportMargins(self.gutter.total_width(), 0, 0, 0)
 
-    def update_line_number_area(self, rect, dy):
+    def update_gutter(self, rect, dy):
         if dy:
-            self.line_number_area.scroll(0, dy)
-            self.folding_area.scroll(0, dy)
+            self.gutter.scroll(0, dy)
         else:
-            self.line_number_area.update(0, rect.y(), self.line_number_area.width(), rect.height())
-            self.folding_area.update(0, rect.y(), self.folding_area.width(), rect.height())
+            self.gutter.update(0, rect.y(), self.gutter.width(), rect.height())
         if rect.contains(self.viewport().rect()):
-            self.update_line_number_area_width(0)
+            self.update_gutter_width(0)
 
     def resizeEvent(self, event):
         super().resizeEvent(event)
         cr = self.contentsRect()
-        line_width = self.line_number_width()
-        self.line_number_area.setGeometry(QtCore.QRect(cr.left(), cr.top(), line_width, cr.height()))
-        self.folding_area.setGeometry(QtCore.QRect(cr.left() + line_width, cr.top(), 20, cr.height()))
-
-    def line_number_area_paint_event(self, event):
-        painter = QtGui.QPainter(self.line_number_area)
-        painter.fillRect(event.rect(), QtGui.QColor(self.theme_manager.get_color("background", "#1e1e1e")))
-        
-        block = self.firstVisibleBlock()
-        block_number = block.blockNumber()
-        top = self.blockBoundingGeometry(block).translated(self.contentOffset()).top()
-        bottom = top + self.blockBoundingRect(block).height()
-        
-        while block.isValid() and top <= event.rect().bottom():
-            if block.isVisible() and bottom >= event.rect().top():
-                number = str(block_number + 1)
-                painter.setPen(QtGui.QColor(self.theme_manager.get_color("lineNumbers", "#858585")))
-                painter.setFont(self.font())
-                painter.drawText(0, int(top), self.line_number_area.width() - 2,
-                                 self.fontMetrics().height(), QtCore.Qt.AlignRight, number)
-            
-            block = block.next()
-            if block.isValid():
-                top = self.blockBoundingGeometry(block).translated(self.contentOffset()).top()
-                bottom = top + self.blockBoundingRect(block).height()
-            block_number += 1
+        self.gutter.setGeometry(QtCore.QRect(cr.left(), cr.top(), self.gutter.total_width(), cr.height()))
 
     def highlight_current_line(self):
-        extra_selections = []
-        if not self.isReadOnly():
+        """Перерисовывает только прежнюю и новую текущие строки"""
+        block = self.textCursor().block()
+        if block == self.current_line_block:
+            return
+        for changed in (self.current_line_block, block):
+            if changed.isValid() and changed.isVisible():
+                self.viewport().update(self.line_rect(changed))
+        self.current_line_block = block
+
+    def set_search_highlights(self, ranges):
+        """Подсвечивает найденные совпадения [(начало, конец)] через ExtraSelection"""
+        last = self.document().characterCount() - 1
+        selections = []
+        for start, end in ranges:
             selection = QtWidgets.QTextEdit.ExtraSelection()
-            line_color = QtGui.QColor(self.theme_manager.get_color("lineHighlight", "#2a2a2a"))
-            selection.format.setBackground(line_color)
-            selection.format.setProperty(QtGui.QTextFormat.FullWidthSelection, True)
-            selection.cursor = self.textCursor()
-            selection.cursor.clearSelection()
-            extra_selections.append(selection)
-        self.setExtraSelections(extra_selections)
\ No newline at end of file
+            selection.format.setBackground(self.search_highlight_color)
+            selection.cursor = QtGui.QTextCursor(self.document())
+            selection.cursor.setPosition(min(start, last))
+            selection.cursor.setPosition(min(end, last), QtGui.QTextCursor.MoveMode.KeepAnchor)
+            selections.append(selection)
+        self.setExtraSelections(selections)
+
+    def line_rect(self, block):
+        """Прямоугольник блока на всю ширину области просмотра"""
+        rect = self.blockBoundingGeometry(block).translated(self.contentOffset()).toAlignedRect()
+        return QtCore.QRect(0, rect.top(), self.viewport().width(), rect.height())
+
+    def paintEvent(self, event):
+        if not self.isReadOnly():
+            block = self.textCursor().block()
+            if block.isVisible():
+                rect = self.line_rect(block)
+                if rect.intersects(event.rect()):
+                    painter = QtGui.QPainter(self.viewport())
+                    painter.fillRect(rect, self.line_highlight_color)
+                    painter.end()
+        super().paintEvent(event)
@@ -0,0 +1,144 @@
+from PySide6 import QtWidgets, QtCore
+from utils.file_search import FileSearch
+from utils.search_index import compile_pattern
+import os
+import re
+
+PATH_ROLE = QtCore.Qt.UserRole
+MATCH_ROLE = QtCore.Qt.UserRole + 1
+
+
+class FindInFilesDock(QtWidgets.QDockWidget):
+    """Поиск по всем файлам проекта от корня дерева файлов.
+
+    Результаты добавляются в дерево по мере поступления: файл — узел,
+    совпадения — его строки. Двойной щелчок открывает файл на строке
+    совпадения.
+    """
+
+    MAX_RESULTS = 20000  # дальше поиск останавливается, чтобы не раздувать дерево
+
+    def __init__(self, parent=None):
+        super().__init__("Find in Files", parent)
+        self.parent = parent
+        self.setAllowedAreas(QtCore.Qt.BottomDockWidgetArea | QtCore.Qt.LeftDockWidgetArea
+                             | QtCore.Qt.RightDockWidgetArea)
+
+        self.search = FileSearch(self)
+        self.search.results_found.connect(self.add_results)
+        self.search.progress.connect(self.show_progress)
+        self.search.finished.connect(self.on_finished)
+
+        widget = QtWidgets.QWidget()
+        layout = QtWidgets.QVBoxLayout(widget)
+        layout.setContentsMargins(4, 4, 4, 4)
+
+        query_layout = QtWidgets.QHBoxLayout()
+        self.find_input = QtWidgets.QLineEdit()
+        self.find_input.setPlaceholderText("Text to find in files...")
+        self.find_input.returnPressed.connect(self.start_search)
+        query_layout.addWidget(self.find_input)
+        self.case_sensitive = QtWidgets.QCheckBox("Case sensitive")
+        query_layout.addWidget(self.case_sensitive)
+        self.whole_words = QtWidgets.QCheckBox("Whole words")
+        query_layout.addWidget(self.whole_words)
+        self.use_regex = QtWidgets.QCheckBox("Regular expression")
+        query_layout.addWidget(self.use_regex)
+        self.search_btn = QtWidgets.QPushButton("Search")
+        self.search_btn.clicked.connect(self.start_search)
+        query_layout.addWidget(self.search_btn)
+        self.cancel_btn = QtWidgets.QPushButton("Cancel")
+        self.cancel_btn.clicked.connect(self.cancel_search)
+        self.cancel_btn.setEnabled(False)
+        query_layout.addWidget(self.cancel_btn)
+        layout.addLayout(query_layout)
+
+        self.status_label = QtWidgets.QLabel()
+        layout.addWidget(self.status_label)
+
+        self.results = QtWidgets.QTreeWidget()
+        self.results.setHeaderHidden(True)
+        self.results.setUniformRowHeights(True)
+        self.results.itemActivated.connect(self.open_result)
+        layout.addWidget(self.results)
+
+        self.setWidget(widget)
+        self.root = None
+        self.shown_matches = 0
+        self.used_index = False
+
+    def focus_input(self, text=""):
+        if text:
+            self.find_input.setText(text)
+        self.find_input.setFocus()
+        self.find_input.selectAll()
+
+    def start_search(self):
+        text = self.find_input.text()
+        root = self.parent.file_tree_dock.root_path()
+        if not text or not root:
+            return
+        try:
+            regex = compile_pattern(text, self.case_sensitive.isChecked(),
+                                    self.whole_words.isChecked(), self.use_regex.isChecked())
+        except re.error as e:
+            self.status_label.setText(f"Invalid pattern: {e}")
+            return
+        index = self.parent.project_index
+        candidates = None
+        if index.is_ready_for(root):
+            # Индекс отбирает файлы, где есть все тройки символов запроса
+            candidates = index.candidates(text, self.use_regex.isChecked())
+        # Первый поиск включает индекс содержимого для следующих
+        index.enable_contents()
+        self.search.cancel()
+        self.results.clear()
+        self.root = root
+        self.shown_matches = 0
+        self.used_index = candidates is not None
+        self.search_btn.setEnabled(False)
+        self.cancel_btn.setEnabled(True)
+        self.status_label.setText(f"Searching in {root}...")
+        self.search.start(root, regex, candidates)
+
+    def cancel_search(self):
+        self.search.cancel()
+
+    def add_results(self, results):
+        self.results.setUpdatesEnabled(False)
+        for path, matches in results:
+            file_item = QtWidgets.QTreeWidgetItem([f"{os.path.relpath(path, self.root)} ({len(matches)})"])
+            file_item.setData(0, PATH_ROLE, path)
+            for line, column, length, text in matches:
+                item = QtWidgets.QTreeWidgetItem(file_item, [f"{line + 1}: {text.strip()}"])
+                item.setData(0, PATH_ROLE, path)
+                item.setData(0, MATCH_ROLE, (line, column, length))
+            self.results.addTopLevelItem(file_item)
+            file_item.setExpanded(True)
+            self.shown_matches += len(matches)
+        self.results.setUpdatesEnabled(True)
+        if self.shown_matches >= self.MAX_RESULTS:
+            self.search.cancel()
+
+    def show_progress(self, files, matches):
+        self.status_label.setText(f"Searching... {matches} matches in {files} files")
+
+    def on_finished(self, files, matches, seconds):
+        self.search_btn.setEnabled(True)
+        self.cancel_btn.setEnabled(False)
+        note = " (stopped)" if self.search.cancelled.is_set() else ""
+        text = f"{matches} matches in {self.results.topLevelItemCount()} of {files} files, {seconds:.2f}s{note}"
+        if self.used_index:
+            stats = self.parent.project_index.stats()
+            text += (f" | index: {stats['files']} files, {stats['size_bytes'] / (1 << 20):.1f} MB,"
+                     f" built in {stats['build_seconds']:.1f}s, query {stats['query_ms']:.1f} ms")
+        self.status_label.setText(text)
+
+    def open_result(self, item):
+        path = item.data(0, PATH_ROLE)
+        match = item.data(0, MATCH_ROLE)
+        if match is None:
+            self.parent.open_file_from_path(path)
+        else:
+            line, column, length = match
+            self.parent.open_file_from_path(path, line, column, length)
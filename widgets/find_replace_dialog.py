@@ -1,12 +1,26 @@
 from PySide6 import QtWidgets, QtCore, QtGui
+from widgets.large_file_viewer import LargeFileViewer
+from utils.search_index import (SearchIndex, compile_pattern, find_match, replace_matches,
+                                changed_span, utf16_positions)
+import re
 
 class FindReplaceDialog(QtWidgets.QDialog):
+    QUERY_DELAY_MS = 150  # пауза после ввода перед поиском
+
     def __init__(self, editor, parent=None):
         super().__init__(parent)
-        self.editor = editor
+        self.editor = None
         self.setWindowTitle("Find and Replace")
         self.setModal(False)
 
+        # Индекс всех совпадений: счётчик "N of M" и подсветка видимых
+        self.index = SearchIndex(self)
+        self.index.results_changed.connect(self.on_results_changed)
+        self.query_timer = QtCore.QTimer(self)
+        self.query_timer.setSingleShot(True)
+        self.query_timer.setInterval(self.QUERY_DELAY_MS)
+        self.query_timer.timeout.connect(self.update_query)
+
         layout = QtWidgets.QVBoxLayout()
 
         find_layout = QtWidgets.QHBoxLayout()
@@ -14,6 +28,8 @@ class FindReplaceDialog(QtWidgets.QDialog):
         self.find_input = QtWidgets.QLineEdit()
         self.find_input.setPlaceholderText("Text to find...")
         find_layout.addWidget(self.find_input)
+        self.count_label = QtWidgets.QLabel()
+        find_layout.addWidget(self.count_label)
         layout.addLayout(find_layout)
 
         replace_layout = QtWidgets.QHBoxLayout()
@@ -28,6 +44,11 @@ class FindReplaceDialog(QtWidgets.QDialog):
         self.whole_words = QtWidgets.QCheckBox("Whole words")
         options_layout.addWidget(self.case_sensitive)
         options_layout.addWidget(self.whole_words)
+        self.use_regex = QtWidgets.QCheckBox("Regular expression")
+        options_layout.addWidget(self.use_regex)
+        options_layout.addStretch()
+        self.status_label = QtWidgets.QLabel()  # итог замены вместо модального окна
+        options_layout.addWidget(self.status_label)
         layout.addLayout(options_layout)
 
         buttons_layout = QtWidgets.QHBoxLayout()
@@ -50,6 +71,107 @@ class FindReplaceDialog(QtWidgets.QDialog):
 
         self.setLayout(layout)
 
+        self.find_input.textChanged.connect(self.query_timer.start)
+        self.case_sensitive.toggled.connect(self.update_query)
+        self.whole_words.toggled.connect(self.update_query)
+        self.use_regex.toggled.connect(self.update_query)
+        self.set_editor(editor)
+
+    def set_editor(self, editor):
+        """Переключает диалог на другую вкладку"""
+        if editor is self.editor:
+            return
+        self.clear_highlights()
+        if isinstance(self.editor, QtWidgets.QPlainTextEdit):
+            try:
+                self.editor.verticalScrollBar().valueChanged.disconnect(self.highlight_visible_matches)
+            except (TypeError, RuntimeError):
+                pass
+            try:
+                self.editor.cursorPositionChanged.disconnect(self.update_count_label)
+            except (TypeError, RuntimeError):
+                pass
+        self.editor = editor
+        # Для LargeFileViewer индекс не строится, он ищет по mmap сам
+        if isinstance(editor, QtWidgets.QPlainTextEdit):
+            editor.verticalScrollBar().valueChanged.connect(self.highlight_visible_matches)
+            editor.cursorPositionChanged.connect(self.update_count_label)
+            self.index.set_editor(editor if self.isVisible() else None)
+        else:
+            self.index.set_editor(None)
+
+    def update_query(self):
+        self.query_timer.stop()
+        self.status_label.setText("")
+        self.index.set_query(*self.current_query())
+        self.update_count_label()
+
+    def current_query(self):
+        return (self.find_input.text(), self.case_sensitive.isChecked(),
+                self.whole_words.isChecked(), self.use_regex.isChecked())
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if isinstance(self.editor, QtWidgets.QPlainTextEdit):
+            self.index.set_editor(self.editor)
+        self.update_query()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.clear_highlights()
+        self.index.set_editor(None)
+
+    def on_results_changed(self):
+        self.update_count_label()
+        self.highlight_visible_matches()
+
+    def update_count_label(self):
+        if self.index.error:
+            self.count_label.setText("Invalid pattern")
+        elif self.index.regex is None:
+            self.count_label.setText("")
+        elif self.index.searching and not self.index.count():
+            self.count_label.setText("Searching...")
+        elif not self.index.count():
+            self.count_label.setText("No results")
+        else:
+            cursor = self.editor.textCursor()
+            current = self.index.index_of(cursor.selectionStart(), cursor.selectionEnd())
+            if current >= 0:
+                self.count_label.setText(f"{current + 1} of {self.index.count()}")
+            else:
+                self.count_label.setText(f"{self.index.count()} matches")
+
+    def highlight_visible_matches(self):
+        """Подсвечивает только совпадения в видимой части документа"""
+        editor = self.editor
+        if not isinstance(editor, QtWidgets.QPlainTextEdit) or not self.isVisible():
+            return
+        first = editor.firstVisibleBlock()
+        last = editor.cursorForPosition(QtCore.QPoint(0, editor.viewport().height())).block()
+        end = last.position() + last.length()
+        editor.set_search_highlights(self.index.matches_between(first.position(), end))
+
+    def clear_highlights(self):
+        if isinstance(self.editor, QtWidgets.QPlainTextEdit):
+            try:
+                self.editor.set_search_highlights([])
+            except RuntimeError:
+                pass  # вкладку уже закрыли
+
+    def select_match(self, backward=False):
+        """Переходит к следующему совпадению по индексу без повторного поиска"""
+        cursor = self.editor.textCursor()
+        position = cursor.selectionStart() if backward else cursor.selectionEnd()
+        index = self.index.next_index(position, backward)
+        if index < 0:
+            return False
+        start, end = self.index.match(index)
+        cursor.setPosition(start)
+        cursor.setPosition(end, QtGui.QTextCursor.MoveMode.KeepAnchor)
+        self.editor.setTextCursor(cursor)
+        return True
+
     def find_flags(self):
         flags = QtGui.QTextDocument.FindFlags()
         if self.case_sensitive.isChecked():
@@ -58,50 +180,103 @@ class FindReplaceDialog(QtWidgets.QDialog):
             flags |= QtGui.QTextDocument.FindWholeWords
         return flags
 
+    def index_matches_input(self):
+        """Индекс готов и построен именно для текста в поле поиска"""
+        return (self.index.editor is self.editor and self.index.query == self.current_query()
+                and self.index.is_ready())
+
+    def find_in_editor(self, backward=False):
+        """Поиск тем же re, что и индекс, пока индекс не готов.
+
+        Возвращает True/False — найдено ли совпадение, None — шаблон с ошибкой.
+        """
+        try:
+            regex = compile_pattern(*self.current_query())
+        except re.error as e:
+            self.status_label.setText(f"Invalid pattern: {e}")
+            return None
+        cursor = self.editor.textCursor()
+        position = cursor.selectionStart() if backward else cursor.selectionEnd()
+        match = find_match(self.editor.toPlainText(), regex, position, backward)
+        if match is None:
+            return False
+        cursor.setPosition(match[0])
+        cursor.setPosition(match[1], QtGui.QTextCursor.MoveMode.KeepAnchor)
+        self.editor.setTextCursor(cursor)
+        return True
+
     def find_next(self):
         text = self.find_input.text()
-        if text:
-            found = self.editor.find(text, self.find_flags())
-            if not found:
-                cursor = self.editor.textCursor()
-                cursor.movePosition(QtGui.QTextCursor.MoveOperation.Start)
-                self.editor.setTextCursor(cursor)
-                found = self.editor.find(text, self.find_flags())
-                if not found:
-                    QtWidgets.QMessageBox.information(self, "Search", f"Text '{text}' not found")
+        if text and isinstance(self.editor, LargeFileViewer):
+            if not self.editor.find(text, self.find_flags()):
+                QtWidgets.QMessageBox.information(self, "Search", f"Text '{text}' not found")
+        elif text and self.index_matches_input():
+            if not self.select_match():
+                QtWidgets.QMessageBox.information(self, "Search", f"Text '{text}' not found")
+        elif text:
+            if self.find_in_editor() is False:
+                QtWidgets.QMessageBox.information(self, "Search", f"Text '{text}' not found")
 
     def find_previous(self):
         text = self.find_input.text()
-        if text:
-            flags = self.find_flags() | QtGui.QTextDocument.FindBackward
-            found = self.editor.find(text, flags)
-            if not found:
-                cursor = self.editor.textCursor()
-                cursor.movePosition(QtGui.QTextCursor.MoveOperation.End)
-                self.editor.setTextCursor(cursor)
-                found = self.editor.find(text, flags)
-                if not found:
-                    QtWidgets.QMessageBox.information(self, "Search", f"Text '{text}' not found")
+        if text and isinstance(self.editor, LargeFileViewer):
+            if not self.editor.find(text, self.find_flags() | QtGui.QTextDocument.FindBackward):
+                QtWidgets.QMessageBox.information(self, "Search", f"Text '{text}' not found")
+        elif text and self.index_matches_input():
+            if not self.select_match(backward=True):
+                QtWidgets.QMessageBox.information(self, "Search", f"Text '{text}' not found")
+        elif text:
+            if self.find_in_editor(backward=True) is False:
+                QtWidgets.QMessageBox.information(self, "Search", f"Text '{text}' not found")
 
     def replace(self):
+        if isinstance(self.editor, LargeFileViewer):
+            return
         if not self.editor.textCursor().hasSelection():
             self.find_next()
-        if self.editor.textCursor().hasSelection():
-            self.editor.textCursor().insertText(self.replace_input.text())
+        cursor = self.editor.textCursor()
+        if cursor.hasSelection():
+            replacement = self.replace_input.text()
+            if self.use_regex.isChecked():
+                # Группы шаблона раскрываются по выделенному совпадению
+                try:
+                    regex = compile_pattern(*self.current_query())
+                    match = regex.fullmatch(cursor.selectedText().replace('\u2029', '\n'))
+                    if match is None:
+                        self.find_next()
+                        return
+                    replacement = match.expand(replacement)
+                except re.error as e:
+                    self.status_label.setText(f"Invalid pattern: {e}")
+                    return
+            cursor.insertText(replacement)
             self.find_next()
 
     def replace_all(self):
+        """Заменяет все совпадения одной правкой документа.
+
+        Совпадения ищутся и заменяются за один проход по тексту, а в
+        документ вставляется только отличающаяся середина — один шаг
+        отмены и одна перекладка вместо поиска и вставки на каждое совпадение.
+        """
         text = self.find_input.text()
-        replace_text = self.replace_input.text()
-        if not text:
+        if not text or isinstance(self.editor, LargeFileViewer):
             return
-        cursor = self.editor.textCursor()
-        cursor.beginEditBlock()
-        cursor.movePosition(QtGui.QTextCursor.MoveOperation.Start)
-        self.editor.setTextCursor(cursor)
-        count = 0
-        while self.editor.find(text, self.find_flags()):
-            self.editor.textCursor().insertText(replace_text)
-            count += 1
-        cursor.endEditBlock()
-        QtWidgets.QMessageBox.information(self, "Replace", f"Replaced {count} occurrences")
\ No newline at end of file
+        template = self.use_regex.isChecked()
+        old = self.editor.toPlainText()
+        try:
+            regex = compile_pattern(*self.current_query())
+            new, count = replace_matches(old, regex, self.replace_input.text(), template)
+        except re.error as e:
+            self.status_label.setText(f"Invalid pattern: {e}")
+            return
+        if count and new != old:
+            start, old_end, new_end = changed_span(old, new)
+            first, last = utf16_positions(old, [start, old_end])
+            cursor = QtGui.QTextCursor(self.editor.document())
+            cursor.beginEditBlock()
+            cursor.setPosition(first)
+            cursor.setPosition(last, QtGui.QTextCursor.MoveMode.KeepAnchor)
+            cursor.insertText(new[start:new_end])
+            cursor.endEditBlock()
+        self.status_label.setText(f"Replaced {count} occurrences")
@@ -0,0 +1,105 @@
+from PySide6 import QtWidgets, QtCore, QtGui
+
+
+class Gutter(QtWidgets.QWidget):
+    """Номера строк и маркеры сворачивания слева от редактора.
+
+    Обе колонки рисуются за один проход: высоты блоков накапливаются
+    через blockBoundingRect, цвета темы и метрики шрифта кэшируются,
+    а номера строк выводятся из кэша QStaticText.
+    """
+
+    FOLD_WIDTH = 20
+    MAX_CACHED_NUMBERS = 4096
+
+    def __init__(self, editor):
+        super().__init__(editor)
+        self.editor = editor
+        self.number_cache = {}  # строка -> QStaticText
+        self.update_metrics()
+        self.update_theme()
+
+    def update_theme(self):
+        get_color = self.editor.theme_manager.get_color
+        self.background = QtGui.QColor(get_color("background", "#1e1e1e"))
+        self.fold_background = QtGui.QColor(get_color("fold", "#252526"))
+        self.number_color = QtGui.QColor(get_color("lineNumbers", "#858585"))
+        self.update()
+
+    def update_metrics(self):
+        metrics = self.fontMetrics()
+        self.line_height = metrics.height()
+        self.digit_width = metrics.horizontalAdvance('9')
+        self.number_cache.clear()
+        self.fold_markers = {folded: self.static_text(text) for folded, text in ((True, "+"), (False, "-"))}
+
+    def changeEvent(self, event):
+        if event.type() == QtCore.QEvent.Type.FontChange:
+            self.update_metrics()
+        super().changeEvent(event)
+
+    def static_text(self, text):
+        static = QtGui.QStaticText(text)
+        static.setTextFormat(QtCore.Qt.TextFormat.PlainText)
+        static.prepare(QtGui.QTransform(), self.font())
+        return static
+
+    def number_text(self, number):
+        text = str(number)
+        static = self.number_cache.get(text)
+        if static is None:
+            if len(self.number_cache) >= self.MAX_CACHED_NUMBERS:
+                self.number_cache.clear()
+            static = self.static_text(text)
+            self.number_cache[text] = static
+        return static
+
+    def numbers_width(self):
+        digits = len(str(max(1, self.editor.blockCount())))
+        return 3 + self.digit_width * digits
+
+    def total_width(self):
+        return self.numbers_width() + self.FOLD_WIDTH
+
+    def sizeHint(self):
+        return QtCore.QSize(self.total_width(), 0)
+
+    def paintEvent(self, event):
+        editor = self.editor
+        painter = QtGui.QPainter(self)
+        painter.setFont(self.font())
+        rect = event.rect()
+        numbers_width = self.numbers_width()
+        painter.fillRect(QtCore.QRect(0, rect.top(), numbers_width, rect.height()), self.background)
+        painter.fillRect(QtCore.QRect(numbers_width, rect.top(), self.FOLD_WIDTH, rect.height()),
+                         self.fold_background)
+        painter.setPen(self.number_color)
+
+        block = editor.firstVisibleBlock()
+        number = block.blockNumber()
+        # Геометрию с учётом прокрутки считаем один раз, дальше только складываем высоты
+        top = editor.blockBoundingGeometry(block).translated(editor.contentOffset()).top()
+        bottom_limit = rect.bottom()
+        top_limit = rect.top()
+        line_height = self.line_height
+        while block.isValid() and top <= bottom_limit:
+            height = editor.blockBoundingRect(block).height()
+            if block.isVisible() and top + height >= top_limit:
+                static = self.number_text(number + 1)
+                painter.drawStaticText(QtCore.QPointF(numbers_width - 2 - static.size().width(), top), static)
+                if editor.is_foldable(block):
+                    marker = self.fold_markers[editor.is_folded(block)]
+                    size = marker.size()
+                    painter.drawStaticText(
+                        QtCore.QPointF(numbers_width + (self.FOLD_WIDTH - size.width()) / 2,
+                                       top + (line_height - size.height()) / 2), marker)
+            top += height
+            block = block.next()
+            number += 1
+
+    def mousePressEvent(self, event):
+        if event.position().x() < self.numbers_width():
+            return
+        block = self.editor.cursorForPosition(QtCore.QPoint(0, int(event.position().y()))).block()
+        if block.isValid() and self.editor.is_foldable(block):
+            self.editor.toggle_fold(block)
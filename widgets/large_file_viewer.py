@@ -0,0 +1,282 @@
+from PySide6 import QtWidgets, QtCore, QtGui
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+import mmap
+import re
+
+
+class LineIndexer(QtCore.QThread):
+    """Строит разреженный индекс начал строк файла в фоне.
+
+    Сохраняется начало каждой STRIDE-й строки, остальные находятся
+    коротким поиском от ближайшей контрольной точки.
+    """
+
+    progress = QtCore.Signal(int)  # сколько строк уже найдено
+
+    STRIDE = 64
+    CHUNK_SIZE = 16 << 20
+
+    def __init__(self, data, parent=None):
+        super().__init__(parent)
+        self.data = data
+        self.offsets = array('Q', [0])  # начало строк 0, STRIDE, 2*STRIDE, ...
+        self.line_count = 1             # число начатых строк
+        self.done = False
+
+    def run(self):
+        data = self.data
+        size = len(data)
+        pos = 0
+        while pos < size and not self.isInterruptionRequested():
+            chunk = data[pos:pos + self.CHUNK_SIZE]
+            end = chunk.rfind(b'\n')
+            if end == -1:
+                pos += len(chunk)
+                continue
+            parts = chunk[:end].split(b'\n')
+            # cumulative[j] + j + 1 — смещение начала (j+1)-й новой строки в куске
+            cumulative = list(accumulate(map(len, parts)))
+            first = (-self.line_count) % self.STRIDE
+            self.offsets.extend(pos + cumulative[j] + j + 1 for j in range(first, len(parts), self.STRIDE))
+            self.line_count += len(parts)
+            pos += end + 1
+            self.progress.emit(self.line_count)
+        self.done = not self.isInterruptionRequested()
+        self.progress.emit(self.line_count)
+
+
+class LargeFileViewer(QtWidgets.QAbstractScrollArea):
+    """Просмотр очень больших файлов только для чтения.
+
+    Файл отображается в память через mmap, на экран выводятся только
+    видимые строки, номера строк и поиск работают по индексу LineIndexer.
+    """
+
+    blockCountChanged = QtCore.Signal(int)
+
+    MAX_LINE_BYTES = 4096  # длиннее строки обрезаются при показе
+    GUTTER_PADDING = 8
+
+    def __init__(self, file_path, theme_manager, parent=None):
+        super().__init__(parent)
+        self.theme_manager = theme_manager
+        self.file_path = file_path
+        self.is_modified = False
+        self.loading = False
+
+        self.file = open(file_path, 'rb')
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.size = len(self.data)
+        self.match = None  # (начало, конец) найденного текста в байтах
+        self.max_width = 0
+
+        self.setFont(QtGui.QFont("Consolas", 12))
+        self.viewport().setCursor(QtCore.Qt.IBeamCursor)
+        self.setFocusPolicy(QtCore.Qt.StrongFocus)
+        self.apply_theme()
+
+        self.indexer = LineIndexer(self.data, self)
+        self.indexer.progress.connect(self.on_index_progress)
+        self.indexer.start()
+
+    def apply_theme(self):
+        self.colors = {
+            key: QtGui.QColor(self.theme_manager.get_color(key, default))
+            for key, default in (("background", "#1e1e1e"), ("foreground", "#d4d4d4"),
+                                 ("selection", "#264f78"), ("lineNumbers", "#858585"))
+        }
+        self.viewport().update()
+
+    def set_language_from_file(self, file_path):
+        """Подсветка синтаксиса в режиме просмотра не поддерживается"""
+        pass
+
+    def cancel_load(self):
+        """Останавливает индексацию и освобождает файл"""
+        self.indexer.requestInterruption()
+        self.indexer.wait()
+        self.data.close()
+        self.file.close()
+
+    # --- индекс строк ---
+
+    def blockCount(self):
+        if self.indexer.done:
+            return self.indexer.line_count
+        return max(1, self.indexer.line_count - 1)
+
+    def line_start(self, line):
+        """Смещение начала строки: контрольная точка плюс короткий поиск"""
+        stride = LineIndexer.STRIDE
+        pos = self.indexer.offsets[line // stride]
+        for _ in range(line % stride):
+            pos = self.data.find(b'\n', pos) + 1
+        return pos
+
+    def line_end(self, start):
+        end = self.data.find(b'\n', start)
+        return self.size if end == -1 else end
+
+    def line_for_offset(self, offset):
+        stride = LineIndexer.STRIDE
+        checkpoint = bisect_right(self.indexer.offsets, offset) - 1
+        line = checkpoint * stride
+        pos = self.indexer.offsets[checkpoint]
+        while True:
+            nxt = self.data.find(b'\n', pos)
+            if nxt == -1 or nxt >= offset:
+                return line
+            pos = nxt + 1
+            line += 1
+
+    def decode(self, start, end):
+        raw = self.data[start:min(end, start + self.MAX_LINE_BYTES)]
+        return raw.decode('utf-8', errors='replace').rstrip('\r').expandtabs(4)
+
+    def on_index_progress(self, count):
+        self.update_scrollbars()
+        self.blockCountChanged.emit(self.blockCount())
+        self.viewport().update()
+
+    # --- отрисовка ---
+
+    def line_height(self):
+        return self.fontMetrics().height()
+
+    def visible_lines(self):
+        return max(1, self.viewport().height() // max(1, self.line_height()))
+
+    def gutter_width(self):
+        digits = len(str(self.blockCount()))
+        return self.fontMetrics().horizontalAdvance('9') * digits + self.GUTTER_PADDING
+
+    def update_scrollbars(self):
+        visible = self.visible_lines()
+        bar = self.verticalScrollBar()
+        bar.setRange(0, max(0, self.blockCount() - visible))
+        bar.setPageStep(visible)
+        hbar = self.horizontalScrollBar()
+        hbar.setRange(0, max(0, self.max_width - self.viewport().width() + self.gutter_width()))
+        hbar.setPageStep(self.viewport().width())
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_scrollbars()
+
+    def paintEvent(self, event):
+        painter = QtGui.QPainter(self.viewport())
+        painter.setFont(self.font())
+        painter.fillRect(event.rect(), self.colors["background"])
+
+        metrics = self.fontMetrics()
+        line_height = self.line_height()
+        gutter = self.gutter_width()
+        width = self.viewport().width()
+        text_x = gutter + 4 - self.horizontalScrollBar().value()
+        text_clip = QtCore.QRect(gutter, 0, width - gutter, self.viewport().height())
+
+        first = self.verticalScrollBar().value()
+        count = min(self.visible_lines() + 1, self.blockCount() - first)
+        pos = self.line_start(first) if count > 0 else 0
+        widest = self.max_width
+        for row in range(max(0, count)):
+            end = self.line_end(pos)
+            y = row * line_height
+            text = self.decode(pos, end)
+            widest = max(widest, metrics.horizontalAdvance(text))
+
+            painter.setClipRect(text_clip)
+            if self.match and pos <= self.match[0] <= end:
+                prefix = self.decode(pos, self.match[0])
+                found = self.data[self.match[0]:self.match[1]].decode('utf-8', errors='replace')
+                x = text_x + metrics.horizontalAdvance(prefix)
+                painter.fillRect(x, y, metrics.horizontalAdvance(found), line_height, self.colors["selection"])
+            painter.setPen(self.colors["foreground"])
+            painter.drawText(text_x, y + metrics.ascent(), text)
+
+            painter.setClipping(False)
+            painter.setPen(self.colors["lineNumbers"])
+            painter.drawText(0, y, gutter - self.GUTTER_PADDING // 2, line_height,
+                             QtCore.Qt.AlignRight, str(first + row + 1))
+            pos = end + 1
+
+        if widest > self.max_width:
+            self.max_width = widest
+            self.update_scrollbars()
+
+    def keyPressEvent(self, event):
+        bar = self.verticalScrollBar()
+        key = event.key()
+        if key == QtCore.Qt.Key.Key_PageDown:
+            bar.setValue(bar.value() + bar.pageStep())
+        elif key == QtCore.Qt.Key.Key_PageUp:
+            bar.setValue(bar.value() - bar.pageStep())
+        elif key == QtCore.Qt.Key.Key_Down:
+            bar.setValue(bar.value() + 1)
+        elif key == QtCore.Qt.Key.Key_Up:
+            bar.setValue(bar.value() - 1)
+        elif key == QtCore.Qt.Key.Key_Home:
+            bar.setValue(0)
+        elif key == QtCore.Qt.Key.Key_End:
+            bar.setValue(bar.maximum())
+        else:
+            super().keyPressEvent(event)
+
+    # --- поиск ---
+
+    def find(self, text, flags=QtGui.QTextDocument.FindFlag(0), wrap=True):
+        """Ищет текст в файле, начиная с текущего совпадения или видимой строки"""
+        if not text:
+            return False
+        pattern = re.escape(text.encode('utf-8'))
+        if flags & QtGui.QTextDocument.FindFlag.FindWholeWords:
+            pattern = rb'\b' + pattern + rb'\b'
+        regex_flags = 0 if flags & QtGui.QTextDocument.FindFlag.FindCaseSensitively else re.IGNORECASE
+        regex = re.compile(pattern, regex_flags)
+
+        if flags & QtGui.QTextDocument.FindFlag.FindBackward:
+            start = self.match[0] if self.match else self.line_start(self.verticalScrollBar().value())
+            found = self.find_backward(regex, start)
+            if found is None and wrap:
+                found = self.find_backward(regex, self.size)
+        else:
+            start = self.match[1] if self.match else self.line_start(self.verticalScrollBar().value())
+            found = regex.search(self.data, start)
+            if found is None and wrap:
+                found = regex.search(self.data, 0)
+        if found is None:
+            return False
+        self.match = found.span()
+        self.scroll_to_offset(self.match[0])
+        return True
+
+    def find_backward(self, regex, end, window=4 << 20, overlap=4096):
+        """Последнее совпадение до end: просматриваем файл окнами с конца.
+
+        Окна перекрываются, чтобы не терять совпадения на их границе.
+        """
+        while end > 0:
+            begin = max(0, end - window)
+            last = None
+            for last in regex.finditer(self.data, begin, end):
+                pass
+            if last is not None:
+                return last
+            if begin == 0:
+                break
+            end = begin + overlap
+        return None
+
+    def goto_line(self, line, column=0, length=0):
+        """Прокручивает к строке line; столбец не выделяется — просмотр без курсора"""
+        self.match = None
+        self.verticalScrollBar().setValue(max(0, line - self.visible_lines() // 2))
+        self.viewport().update()
+
+    def scroll_to_offset(self, offset):
+        # Пока индекс не достроен, дальняя строка может быть ещё недоступна
+        line = self.line_for_offset(offset)
+        self.verticalScrollBar().setValue(max(0, line - self.visible_lines() // 2))
+        self.viewport().update()
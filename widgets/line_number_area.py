@@ -1,12 +0,0 @@
-from PySide6 import QtWidgets, QtCore
-
-class LineNumberArea(QtWidgets.QWidget):
-    def __init__(self, editor):
-        super().__init__(editor)
-        self.editor = editor
-
-    def sizeHint(self):
-        return QtCore.QSize(self.editor.line_number_width(), 0)
-
-    def paintEvent(self, event):
-        self.editor.line_number_area_paint_event(event)
\ No newline at end of file
@@ -0,0 +1,296 @@
+from PySide6 import QtCore, QtWidgets
+from utils.ignore_rules import IgnoreRules
+import os
+
+
+class TreeNode:
+    """Файл или каталог дерева проекта"""
+
+    NOT_LOADED, LOADING, LOADED = range(3)
+
+    def __init__(self, name, path, is_dir, parent=None):
+        self.name = name
+        self.path = path
+        self.is_dir = is_dir
+        self.parent = parent
+        self.row = 0
+        self.children = []
+        self.state = TreeNode.NOT_LOADED if is_dir else TreeNode.LOADED
+        self.removed = False
+
+    def key(self):
+        return (not self.is_dir, self.name.casefold(), self.name)
+
+    def renumber(self, start=0, end=None):
+        for row in range(start, len(self.children) if end is None else end):
+            self.children[row].row = row
+
+    def child_row(self, child):
+        """Номер строки child; устаревший номер находится заново поиском по ключу"""
+        row = child.row
+        children = self.children
+        if row < len(children) and children[row] is child:
+            return row
+        key = child.key()
+        lo, hi = 0, len(children)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if children[mid].key() < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        child.row = lo
+        return lo
+
+
+class DirectoryListerSignals(QtCore.QObject):
+    batch_loaded = QtCore.Signal(int, object, object, bool)  # поколение, узел, [(имя, каталог)], последняя пачка
+
+
+class DirectoryLister(QtCore.QRunnable):
+    """Читает содержимое одного каталога, отбрасывает исключённое и сортирует.
+
+    Записи отдаются пачками по BATCH_SIZE, чтобы модель вставляла их
+    частями и дерево оставалось отзывчивым на огромных каталогах.
+    """
+
+    BATCH_SIZE = 500
+
+    def __init__(self, generation, node, rel_dir, rules, signals):
+        super().__init__()
+        self.generation = generation
+        self.node = node
+        self.rel_dir = rel_dir
+        self.rules = rules
+        self.signals = signals
+
+    def run(self):
+        entries = []
+        try:
+            with os.scandir(self.node.path) as it:
+                for entry in it:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        continue
+                    rel_path = f"{self.rel_dir}/{entry.name}" if self.rel_dir else entry.name
+                    if not self.rules.is_ignored(rel_path, is_dir):
+                        entries.append((entry.name, is_dir))
+        except OSError:
+            pass
+        entries.sort(key=lambda entry: (not entry[1], entry[0].casefold(), entry[0]))
+        for start in range(0, len(entries), self.BATCH_SIZE):
+            done = start + self.BATCH_SIZE >= len(entries)
+            self.signals.batch_loaded.emit(self.generation, self.node, entries[start:start + self.BATCH_SIZE], done)
+        if not entries:
+            self.signals.batch_loaded.emit(self.generation, self.node, [], True)
+
+
+class ProjectTreeModel(QtCore.QAbstractItemModel):
+    """Дерево файлов проекта от выбранной папки.
+
+    В отличие от QFileSystemModel на корне файловой системы, читает только
+    раскрытые каталоги: содержимое загружается в пуле потоков при первом
+    раскрытии и вставляется пачками. Служебные каталоги и пути из
+    .gitignore не показываются. Наблюдаются только загруженные каталоги;
+    их изменения сливаются с уже показанными строками, не сворачивая
+    раскрытые подкаталоги.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QtCore.QThreadPool(self)
+        self.pool.setMaxThreadCount(2)
+        self.signals = DirectoryListerSignals()
+        self.signals.batch_loaded.connect(self.on_batch_loaded)
+        self.watcher = QtCore.QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.on_directory_changed)
+        self.generation = 0
+        self.root = TreeNode("", "", True)
+        self.rules = None
+        self.refreshing = {}  # узел -> записи, собираемые для слияния после изменения каталога
+        self.icons = QtWidgets.QFileIconProvider()
+        self.folder_icon = self.icons.icon(QtWidgets.QFileIconProvider.IconType.Folder)
+        self.file_icon = self.icons.icon(QtWidgets.QFileIconProvider.IconType.File)
+
+    def set_root(self, path):
+        path = os.path.abspath(path)
+        self.beginResetModel()
+        self.generation += 1
+        watched = self.watcher.directories()
+        if watched:
+            self.watcher.removePaths(watched)
+        self.refreshing.clear()
+        self.root = TreeNode(os.path.basename(path) or path, path, True)
+        self.rules = IgnoreRules(path)
+        self.endResetModel()
+        self.fetchMore(QtCore.QModelIndex())
+
+    def root_path(self):
+        return self.root.path
+
+    # --- QAbstractItemModel ---
+
+    def node(self, index):
+        return index.internalPointer() if index.isValid() else self.root
+
+    def index(self, row, column, parent=QtCore.QModelIndex()):
+        node = self.node(parent)
+        if column != 0 or not 0 <= row < len(node.children):
+            return QtCore.QModelIndex()
+        return self.createIndex(row, 0, node.children[row])
+
+    def parent(self, index):
+        if not index.isValid():
+            return QtCore.QModelIndex()
+        parent = index.internalPointer().parent
+        if parent is None or parent is self.root:
+            return QtCore.QModelIndex()
+        return self.createIndex(parent.parent.child_row(parent), 0, parent)
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        return len(self.node(parent).children)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 1
+
+    def hasChildren(self, parent=QtCore.QModelIndex()):
+        node = self.node(parent)
+        return node.is_dir and (node.state != TreeNode.LOADED or bool(node.children))
+
+    def canFetchMore(self, parent):
+        node = self.node(parent)
+        return node.is_dir and node.state == TreeNode.NOT_LOADED
+
+    def fetchMore(self, parent):
+        node = self.node(parent)
+        if node.state != TreeNode.NOT_LOADED:
+            return
+        node.state = TreeNode.LOADING
+        self.list_directory(node)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        if role == QtCore.Qt.DisplayRole:
+            return node.name
+        if role == QtCore.Qt.DecorationRole:
+            return self.folder_icon if node.is_dir else self.file_icon
+        if role == QtCore.Qt.ToolTipRole:
+            return node.path
+        return None
+
+    def file_path(self, index):
+        return self.node(index).path
+
+    def is_dir(self, index):
+        return self.node(index).is_dir
+
+    # --- загрузка каталогов ---
+
+    def list_directory(self, node):
+        rel_dir = os.path.relpath(node.path, self.root.path).replace(os.sep, '/')
+        self.pool.start(DirectoryLister(self.generation, node, '' if rel_dir == '.' else rel_dir,
+                                        self.rules, self.signals))
+
+    def node_index(self, node):
+        if node is self.root:
+            return QtCore.QModelIndex()
+        return self.createIndex(node.parent.child_row(node), 0, node)
+
+    def on_batch_loaded(self, generation, node, entries, done):
+        if generation != self.generation or node.removed:
+            return
+        if node in self.refreshing:
+            self.refreshing[node].extend(entries)
+            if done:
+                self.merge_children(node, self.refreshing.pop(node))
+            return
+        if entries:
+            first = len(node.children)
+            self.beginInsertRows(self.node_index(node), first, first + len(entries) - 1)
+            node.children.extend(TreeNode(name, os.path.join(node.path, name), is_dir, node)
+                                 for name, is_dir in entries)
+            node.renumber(first)
+            self.endInsertRows()
+        if done:
+            node.state = TreeNode.LOADED
+            self.watcher.addPath(node.path)
+
+    def on_directory_changed(self, path):
+        node = self.find_loaded(path)
+        if node is not None and node not in self.refreshing:
+            self.refreshing[node] = []
+            self.list_directory(node)
+
+    def find_loaded(self, path):
+        """Загруженный узел каталога path или None"""
+        rel_dir = os.path.relpath(path, self.root.path)
+        if rel_dir.startswith('..'):
+            return None
+        node = self.root
+        if rel_dir != '.':
+            for name in rel_dir.split(os.sep):
+                node = next((child for child in node.children if child.is_dir and child.name == name), None)
+                if node is None:
+                    return None
+        return node if node.state == TreeNode.LOADED else None
+
+    def merge_children(self, node, entries):
+        """Сливает новое содержимое каталога с показанным: лишнее удаляется, новое вставляется на место"""
+        parent = self.node_index(node)
+        wanted = {(not is_dir, name.casefold(), name) for name, is_dir in entries}
+        row = len(node.children) - 1
+        while row >= 0:
+            if node.children[row].key() in wanted:
+                row -= 1
+                continue
+            # Удаляем подряд идущие исчезнувшие записи одной операцией
+            last = row
+            while row > 0 and node.children[row - 1].key() not in wanted:
+                row -= 1
+            self.beginRemoveRows(parent, row, last)
+            for child in node.children[row:last + 1]:
+                self.forget(child)
+            del node.children[row:last + 1]
+            node.renumber(row)
+            self.endRemoveRows()
+            row -= 1
+        # Новые записи собираются в группы, попадающие в один промежуток
+        # между существующими строками: одна вставка на группу
+        runs = []  # (строка до вставок, новые узлы)
+        row = 0
+        for name, is_dir in entries:
+            key = (not is_dir, name.casefold(), name)
+            while row < len(node.children) and node.children[row].key() < key:
+                row += 1
+            if row < len(node.children) and node.children[row].key() == key:
+                row += 1
+                continue
+            child = TreeNode(name, os.path.join(node.path, name), is_dir, node)
+            if runs and runs[-1][0] == row:
+                runs[-1][1].append(child)
+            else:
+                runs.append((row, [child]))
+        inserted = 0
+        for i, (row, children) in enumerate(runs):
+            row += inserted
+            self.beginInsertRows(parent, row, row + len(children) - 1)
+            node.children[row:row] = children
+            inserted += len(children)
+            # Номера до следующей вставки; строки дальше сверяет child_row
+            end = runs[i + 1][0] + inserted if i + 1 < len(runs) else None
+            node.renumber(row, end)
+            self.endInsertRows()
+
+    def forget(self, node):
+        """Узел удалён из дерева: его загрузки и наблюдение больше не нужны"""
+        node.removed = True
+        if node.is_dir and node.state == TreeNode.LOADED:
+            self.watcher.removePath(node.path)
+        self.refreshing.pop(node, None)
+        for child in node.children:
+            self.forget(child)
@@ -0,0 +1,89 @@
+from PySide6 import QtWidgets, QtCore
+from utils.fuzzy_match import FuzzyFileMatcher
+import os
+
+
+class QuickOpenDialog(QtWidgets.QDialog):
+    """Палитра Go to File (Ctrl+P): нечёткий поиск по файлам корня дерева.
+
+    Список путей берётся из индекса проекта, который строится в фоне
+    и обновляется наблюдателем; совпадения пересчитываются на каждое
+    нажатие клавиши.
+    """
+
+    def __init__(self, project_index, parent=None):
+        super().__init__(parent)
+        self.parent = parent
+        self.project_index = project_index
+        self.matcher = FuzzyFileMatcher()
+        self.files_stale = True
+        self.setWindowTitle("Go to File")
+        self.setWindowFlags(QtCore.Qt.Popup)
+        self.resize(600, 400)
+
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.setContentsMargins(4, 4, 4, 4)
+        self.input = QtWidgets.QLineEdit()
+        self.input.setPlaceholderText("Type a file name...")
+        self.input.textChanged.connect(self.update_results)
+        self.input.installEventFilter(self)
+        layout.addWidget(self.input)
+        self.results = QtWidgets.QListWidget()
+        self.results.setUniformItemSizes(True)
+        self.results.itemActivated.connect(self.open_item)
+        layout.addWidget(self.results)
+        self.status_label = QtWidgets.QLabel()
+        layout.addWidget(self.status_label)
+
+        self.project_index.files_changed.connect(self.on_files_changed)
+
+    def on_files_changed(self):
+        self.files_stale = True
+        if self.isVisible():
+            self.reload_files()
+            self.update_results()
+
+    def reload_files(self):
+        if self.files_stale and self.project_index.root:
+            self.matcher.set_paths(self.project_index.relative_paths())
+            self.files_stale = False
+
+    def popup(self):
+        self.reload_files()
+        parent = self.parentWidget()
+        if parent:
+            geometry = parent.geometry()
+            self.move(geometry.x() + (geometry.width() - self.width()) // 2, geometry.y() + 60)
+        self.input.clear()
+        self.update_results()
+        self.show()
+        self.input.setFocus()
+
+    def update_results(self):
+        count, paths = self.matcher.match(self.input.text())
+        self.results.clear()
+        self.results.addItems(paths)
+        if self.results.count():
+            self.results.setCurrentRow(0)
+        if not self.project_index.ready:
+            self.status_label.setText(f"Indexing files... {len(self.matcher)} so far")
+        else:
+            self.status_label.setText(f"{count} of {len(self.matcher)} files")
+
+    def eventFilter(self, obj, event):
+        # Стрелки и Enter в поле ввода управляют списком
+        if obj is self.input and event.type() == QtCore.QEvent.Type.KeyPress:
+            key = event.key()
+            if key in (QtCore.Qt.Key_Down, QtCore.Qt.Key_Up, QtCore.Qt.Key_PageDown, QtCore.Qt.Key_PageUp):
+                QtWidgets.QApplication.sendEvent(self.results, event)
+                return True
+            if key in (QtCore.Qt.Key_Return, QtCore.Qt.Key_Enter):
+                self.open_item(self.results.currentItem())
+                return True
+        return super().eventFilter(obj, event)
+
+    def open_item(self, item):
+        if item is None:
+            return
+        self.hide()
+        self.parent.open_file_from_path(os.path.join(self.project_index.root, *item.text().split('/')))
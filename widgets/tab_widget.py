@@ -1,8 +1,11 @@
 from PySide6 import QtWidgets, QtCore
 from widgets.code_redactor import CodeEditor
+from widgets.large_file_viewer import LargeFileViewer
 import os
 
 class TabWidget(QtWidgets.QTabWidget):
+    save_finished = QtCore.Signal(str, bool, str)  # путь, успех, текст ошибки
+
     def __init__(self, theme_manager, extension_manager, parent=None):
         super().__init__(parent)
         self.theme_manager = theme_manager
@@ -18,20 +21,48 @@ class TabWidget(QtWidgets.QTabWidget):
         self.parent = parent
 
     def new_tab(self, file_path=None):
+        if file_path and self.is_large_file(file_path):
+            return self.open_large_file(file_path)
         editor = CodeEditor(self.theme_manager, self.extension_manager)
-        if file_path and os.path.exists(file_path):
-            editor.load_file(file_path)
+        if file_path and os.path.exists(file_path) and editor.load_file(file_path):
             tab_name = os.path.basename(file_path)
         else:
             tab_name = "Untitled"
         index = self.addTab(editor, tab_name)
         self.setCurrentIndex(index)
         editor.document().modificationChanged.connect(
-            lambda modified, idx=index: self.update_tab_title(idx, modified))
+            lambda modified, ed=editor: self.update_tab_title(self.indexOf(ed), modified))
+        editor.load_progress.connect(
+            lambda percent, ed=editor: self.show_load_progress(ed, percent))
+        editor.load_finished.connect(
+            lambda ok, ed=editor: self.update_tab_title(self.indexOf(ed), ed.is_modified))
+        editor.save_finished.connect(self.save_finished)
         return editor
 
+    def is_large_file(self, file_path):
+        threshold = self.extension_manager.config.get("large_file_threshold", 256 * 1024 * 1024)
+        try:
+            return os.path.getsize(file_path) > threshold
+        except OSError:
+            return False
+
+    def open_large_file(self, file_path):
+        """Очень большие файлы открываются в режиме просмотра через mmap"""
+        viewer = LargeFileViewer(file_path, self.theme_manager)
+        index = self.addTab(viewer, os.path.basename(file_path))
+        self.setTabToolTip(index, f"{file_path} (read-only)")
+        self.setCurrentIndex(index)
+        return viewer
+
+    def show_load_progress(self, editor, percent):
+        index = self.indexOf(editor)
+        if index >= 0:
+            self.setTabText(index, f"{os.path.basename(editor.file_path)} ({percent}%)")
+
     def update_tab_title(self, index, modified):
         editor = self.widget(index)
+        if editor is None or editor.loading:
+            return
         if editor.file_path:
             title = os.path.basename(editor.file_path)
         else:
@@ -49,9 +80,13 @@ class TabWidget(QtWidgets.QTabWidget):
                 QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No | QtWidgets.QMessageBox.Cancel
             )
             if reply == QtWidgets.QMessageBox.Yes:
-                if not self.parent.save_current_file():
+                if not self.parent.save_current_file(wait=True):
                     return
             elif reply == QtWidgets.QMessageBox.Cancel:
                 return
+        if isinstance(editor, CodeEditor):
+            editor.save_fold_state()
+            editor.journal.discard()
+        editor.cancel_load()
         self.removeTab(index)
         editor.deleteLater()
\ No newline at end of file